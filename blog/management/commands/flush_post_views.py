@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.services import flush_views
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered post views from cache into Post.views_counter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Repeat every N seconds (0 = run once)')
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_views(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} views.'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="post",
+            options={
+                "ordering": ["-created_at", "-id"],
+                "verbose_name": "Пост",
+                "verbose_name_plural": "Посты",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("was_publication", True)),
+                fields=["-created_at", "-id"],
+                name="post_published_created_idx",
+            ),
+        ),
+    ]
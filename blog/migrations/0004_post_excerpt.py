@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 100
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    batch = []
+    for post in Post.objects.only("pk", "description").iterator(chunk_size=1000):
+        post.excerpt = Truncator(post.description or "").chars(EXCERPT_LENGTH)
+        batch.append(post)
+        if len(batch) >= 1000:
+            Post.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ["excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_post_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Начало текста для списка постов, заполняется при сохранении",
+                max_length=100,
+                verbose_name="Анонс",
+            ),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -1,21 +1,44 @@
 from django.db import models
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 100
+
+
+def make_excerpt(text):
+    return Truncator(text or "").chars(EXCERPT_LENGTH)
 
 
 class Post(models.Model):
     name = models.CharField(max_length=100, verbose_name="Заголовок поста", help_text="Укажите заголовок поста")
     description = models.TextField(verbose_name="Основной текст", help_text="Введите текст поста", blank=True,
                                    null=True)
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False, verbose_name="Анонс",
+                               help_text="Начало текста для списка постов, заполняется при сохранении")
     image = models.ImageField(upload_to="post/image", blank=True, null=True, verbose_name="Обложка",
                               help_text="Добавьте изображение для поста")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date Added", help_text="Date Added", blank=True,
                                       null=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date Last Modified", help_text="Date Last Modified",
+                                      blank=True, null=True)
     was_publication = models.BooleanField(default=True, verbose_name="Опубликовано", help_text="Статус публикации поста")
     views_counter = models.PositiveIntegerField(verbose_name="Количество просмотров", help_text="Укажите количество просмотров", default=0)
 
     class Meta:
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
-        ordering = ["description", "name"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], condition=models.Q(was_publication=True),
+                         name="post_published_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Анонс хранится в строке, чтобы список постов не тянул description целиком
+        self.excerpt = make_excerpt(self.description)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "description" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "excerpt"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from blog.models import Post
+from catalog.services import decode_cursor, fetch_page, get_or_compute, make_cache_key, page_cache_part
+
+POST_LIST_NAMESPACE = 'post_list'
+POST_CARD_FIELDS = ('id', 'name', 'excerpt', 'image', 'created_at')
+
+
+def get_posts_page(cursor=None, page_size=None):
+    """
+    Страница опубликованных постов по курсору (created_at DESC, id DESC).
+    Грузятся только поля карточки с готовым анонсом, description не читается.
+    Возвращает (posts, next_cursor); next_cursor равен None на последней странице.
+    """
+    page_size = page_size or getattr(settings, 'POST_LIST_PAGE_SIZE', 10)
+    position = decode_cursor(cursor)
+    cache_key = make_cache_key(POST_LIST_NAMESPACE, page_cache_part(position), page_size)
+    return get_or_compute(cache_key, lambda: _fetch_posts_page(position, page_size))
+
+
+def _fetch_posts_page(position, page_size):
+    return fetch_page(Post.objects.filter(was_publication=True).only(*POST_CARD_FIELDS), position, page_size)
+
+
+# Журнал постов с несброшенными просмотрами: register_view выдаёт номер слота через INCR и пишет в слот id поста,
+# flush_views читает слоты после последнего сброшенного. Так сброс обходит только просмотренные посты.
+DIRTY_LAST_SLOT_KEY = 'post_views:dirty:last'
+DIRTY_FLUSHED_SLOT_KEY = 'post_views:dirty:flushed'
+DIRTY_MISSING_SLOT_KEY = 'post_views:dirty:missing'
+FLUSH_LOCK_KEY = 'post_views:flush:lock'
+
+
+def get_views_key(post_id):
+    return f"post_views:{post_id}"
+
+
+def get_dirty_slot_key(slot):
+    return f"post_views:dirty:{slot}"
+
+
+def register_view(post_id):
+    """Атомарный INCR в кэше вместо UPDATE строки поста; возвращает число несброшенных просмотров."""
+    key = get_views_key(post_id)
+    cache.add(key, 0, timeout=None)
+    pending = cache.incr(key)
+    if pending == 1:
+        _mark_dirty(post_id)
+    return pending
+
+
+def get_pending_views(post_id):
+    return cache.get(get_views_key(post_id), 0)
+
+
+def _mark_dirty(post_id):
+    cache.add(DIRTY_LAST_SLOT_KEY, 0, timeout=None)
+    cache.set(get_dirty_slot_key(cache.incr(DIRTY_LAST_SLOT_KEY)), post_id, timeout=None)
+
+
+def flush_views(batch_size=1000, lock_timeout=5 * 60):
+    """
+    Переносит накопленные просмотры в Post.views_counter.
+    Обходятся только посты из журнала слотов, поэтому цена сброса зависит от числа просмотренных постов,
+    а не от размера блога. Посты с одинаковым приростом обновляются одним
+    UPDATE ... SET views_counter = views_counter + n.
+    Счётчик в кэше уменьшается на сброшенное значение, поэтому просмотры, пришедшие во время сброса, не теряются.
+    Одновременно работает один сброс (блокировка cache.add): второй прочитал бы те же слоты и счётчики
+    и прибавил просмотры дважды. Если блокировка занята, возвращает 0.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=lock_timeout):
+        return 0
+    try:
+        return _flush_slots(batch_size)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def _flush_slots(batch_size):
+    flushed = 0
+    start = cache.get(DIRTY_FLUSHED_SLOT_KEY, 0) + 1
+    last = cache.get(DIRTY_LAST_SLOT_KEY, 0)
+    missing = cache.get(DIRTY_MISSING_SLOT_KEY)
+    while start <= last:
+        slots = range(start, min(start + batch_size, last + 1))
+        found = cache.get_many([get_dirty_slot_key(slot) for slot in slots])
+        post_ids, done = set(), start - 1
+        for slot in slots:
+            key = get_dirty_slot_key(slot)
+            if key in found:
+                post_ids.add(found[key])
+            elif slot != missing:
+                # Номер уже выдан, но register_view ещё не записал слот: дочитаем при следующем сбросе.
+                # Если слота нет и тогда (вытеснен или процесс упал), он пропускается
+                cache.set(DIRTY_MISSING_SLOT_KEY, slot, timeout=None)
+                break
+            done = slot
+        flushed += _flush_batch(sorted(post_ids))
+        cache.delete_many([get_dirty_slot_key(slot) for slot in range(start, done + 1)])
+        cache.set(DIRTY_FLUSHED_SLOT_KEY, done, timeout=None)
+        if done < slots[-1]:
+            break
+        start = done + 1
+    return flushed
+
+
+def _flush_batch(post_ids):
+    pending = cache.get_many([get_views_key(post_id) for post_id in post_ids])
+    by_delta = defaultdict(list)
+    for post_id in post_ids:
+        delta = pending.get(get_views_key(post_id))
+        if delta:
+            by_delta[delta].append(post_id)
+
+    flushed = 0
+    for delta, ids in by_delta.items():
+        Post.objects.filter(pk__in=ids).update(views_counter=F('views_counter') + delta)
+        for post_id in ids:
+            try:
+                remaining = cache.decr(get_views_key(post_id), delta)
+            except ValueError:
+                # Ключ вытеснили после UPDATE: просмотры уже в БД, вычитать не из чего
+                continue
+            if remaining > 0:
+                # Просмотры, пришедшие во время сброса, не получили pending == 1 и слот — ставим его сами
+                _mark_dirty(post_id)
+        flushed += delta * len(ids)
+    return flushed
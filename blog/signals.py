@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from blog.models import Post
+from blog.services import POST_LIST_NAMESPACE
+from catalog.services import bump_generation
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_caches(sender, instance, using=None, **kwargs):
+    transaction.on_commit(lambda: bump_generation(POST_LIST_NAMESPACE), using=using)
@@ -1,10 +1,10 @@
 from django import template
 
+from catalog.images import render_responsive_image
+
 register = template.Library()
 
 
-@register.filter()
-def media_filter(path):
-    if path:
-        return f"/{path}"
-    return "#"
+@register.simple_tag()
+def responsive_image(image, size='card', alt='', css_class=''):
+    return render_responsive_image(image, size, alt, css_class)
@@ -1,3 +1,136 @@
-from django.test import TestCase
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Post, EXCERPT_LENGTH
+from blog.services import (register_view, flush_views, get_pending_views, get_posts_page, DIRTY_LAST_SLOT_KEY,
+                           FLUSH_LOCK_KEY)
+from catalog.services import seek_after
+from catalog.local_cache import local_cache
+
+
+class CacheIsolationMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        local_cache.clear()
+
+
+class FlushViewsTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Post.objects.bulk_create([Post(name=f'Post {i}', description='text') for i in range(50)])
+        cls.viewed = list(Post.objects.order_by('pk')[:2])
+
+    def test_flush_touches_only_viewed_posts(self):
+        for post in self.viewed:
+            register_view(post.pk)
+            register_view(post.pk)
+        # Оба поста получили по 2 просмотра: один UPDATE на группу, без обхода таблицы
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_views(), 4)
+        self.assertEqual(
+            list(Post.objects.filter(pk__in=[post.pk for post in self.viewed]).values_list('views_counter', flat=True)),
+            [2, 2],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_views(), 0)
+
+    def test_views_after_flush_are_flushed_next_time(self):
+        post = self.viewed[0]
+        register_view(post.pk)
+        flush_views()
+        register_view(post.pk)
+        self.assertEqual(flush_views(), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.views_counter, 2)
+        self.assertEqual(get_pending_views(post.pk), 0)
+
+    def test_evicted_counter_after_update_is_not_an_error(self):
+        post = self.viewed[0]
+        register_view(post.pk)
+        with mock.patch.object(cache, 'decr', side_effect=ValueError):
+            self.assertEqual(flush_views(), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.views_counter, 1)
+
+    def test_slot_taken_but_not_written_is_retried_then_skipped(self):
+        cache.add(DIRTY_LAST_SLOT_KEY, 0, timeout=None)
+        cache.incr(DIRTY_LAST_SLOT_KEY)
+        register_view(self.viewed[0].pk)
+        self.assertEqual(flush_views(), 0)
+        self.assertEqual(flush_views(), 1)
+
+    def test_concurrent_flush_is_skipped(self):
+        post = self.viewed[0]
+        register_view(post.pk)
+        cache.add(FLUSH_LOCK_KEY, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_views(), 0)
+        self.assertEqual(get_pending_views(post.pk), 1)
+        cache.delete(FLUSH_LOCK_KEY)
+        self.assertEqual(flush_views(), 1)
+        self.assertIsNone(cache.get(FLUSH_LOCK_KEY))
+
+
+class PostDetailConditionalGetTest(CacheIsolationMixin, TestCase):
+    def test_no_last_modified_revalidation(self):
+        post = Post.objects.create(name='Post', description='text')
+        url = reverse('blog:posts_detail', args=[post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(url, headers={'if_modified_since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, headers={'if_none_match': response['ETag']}).status_code, 304)
+
+
+@override_settings(POST_LIST_PAGE_SIZE=4)
+class PostListViewTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(6):
+            Post.objects.create(name=f'Post {i}', description='слово ' * 100)
+        Post.objects.create(name='Draft', description='text', was_publication=False)
+
+    def test_first_and_next_page(self):
+        response = self.client.get(reverse('blog:posts_list'))
+        self.assertEqual(response.status_code, 200)
+        first_page = [post.pk for post in response.context['object_list']]
+        self.assertEqual(len(first_page), 4)
+
+        response = self.client.get(reverse('blog:posts_list'), {'cursor': response.context['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+        second_page = [post.pk for post in response.context['object_list']]
+        self.assertEqual(len(second_page), 2)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertFalse(set(first_page) & set(second_page))
+
+    def test_page_renders_stored_excerpt_without_loading_bodies(self):
+        posts, _ = get_posts_page()
+        self.assertTrue(all('description' in post.get_deferred_fields() for post in posts))
+        self.assertEqual(len(posts[0].excerpt), EXCERPT_LENGTH)
+        self.assertContains(self.client.get(reverse('blog:posts_list')), posts[0].excerpt)
+
+    def test_undated_posts_come_last(self):
+        Post.objects.filter(pk=Post.objects.filter(was_publication=True).order_by('pk').first().pk).update(
+            created_at=None)
+        walked, cursor = [], None
+        while True:
+            posts, cursor = get_posts_page(cursor)
+            walked += posts
+            if cursor is None:
+                break
+        self.assertEqual(len(walked), 6)
+        self.assertIsNone(walked[-1].created_at)
+
+    @skipUnless(connection.vendor == 'sqlite', 'query plan text is SQLite-specific')
+    def test_page_order_is_served_by_the_partial_index(self):
+        post = Post.objects.order_by('pk').first()
+        for queryset in seek_after(Post.objects.filter(was_publication=True), (post.created_at, post.pk)):
+            plan = queryset[:11].explain()
+            self.assertIn('USING INDEX post_published_created_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
@@ -1,23 +1,55 @@
 from django.urls import reverse_lazy, reverse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 
 from blog.models import Post
+from blog.services import register_view, get_pending_views, get_posts_page, POST_LIST_NAMESPACE
+from catalog.services import get_generation
 
 
+def post_list_etag(request, *args, **kwargs):
+    cursor = request.GET.get('cursor', '')
+    return f"posts-{get_generation(POST_LIST_NAMESPACE)}-{cursor}-{request.user.pk or 'anon'}"
+
+
+def post_detail_etag(request, pk):
+    updated_at = Post.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return f"post-{pk}-{updated_at.timestamp()}-{request.user.pk or 'anon'}"
+
+
+@method_decorator(condition(etag_func=post_list_etag), name='get')
 class PostListView(ListView):
     model = Post
+    # get_queryset отдаёт список страницы, а не QuerySet, поэтому имя шаблона задано явно
+    template_name = 'blog/post_list.html'
 
     def get_queryset(self):
-        return Post.objects.filter(was_publication=True)
+        posts, self.next_cursor = get_posts_page(self.request.GET.get('cursor'))
+        return posts
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        return context
 
 
+@method_decorator(condition(etag_func=post_detail_etag), name='get')
 class PostDetailView(DetailView):
     model = Post
 
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        # Просмотр засчитывается и при 304: клиент открыл пост, просто страница у него уже есть
+        if request.method == 'GET' and response.status_code in (200, 304):
+            register_view(kwargs['pk'])
+        return response
+
     def get_object(self, queryset=None):
         self.object = super().get_object(queryset)
-        self.object.views_counter += 1
-        self.object.save()
+        self.object.views_counter += get_pending_views(self.object.pk)
         return self.object
 
 
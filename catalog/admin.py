@@ -1,5 +1,8 @@
 from django.contrib import admin
-from catalog.models import Product, Category
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.db import connection
+from catalog.models import Product, Category, EmailOutbox
+from catalog.services import search_products, bulk_unpublish_products, bulk_delete_products
 
 # Register your models here.
 @admin.register(Product)
@@ -7,8 +10,41 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "price", "category", "is_published", "owner")
     list_filter = ("category", "is_published")
     search_fields = ("name", "description")
+    actions = ("unpublish_selected", "bulk_delete_selected")
+
+    def has_unpublish_permission(self, request):
+        return request.user.has_perm("catalog.can_unpublish_product")
+
+    @admin.action(description="Снять с публикации", permissions=["unpublish"])
+    def unpublish_selected(self, request, queryset):
+        count = bulk_unpublish_products(queryset)
+        self.message_user(request, f"Снято с публикации: {count}")
+
+    @admin.action(description="Удалить одним запросом", permissions=["delete"])
+    def bulk_delete_selected(self, request, queryset):
+        # queryset списка админки может нести аннотации поиска, DELETE строим по чистому подзапросу pk
+        count = bulk_delete_products(Product.objects.filter(pk__in=queryset.values("pk")))
+        self.message_user(request, f"Удалено: {count}")
+
+    def get_ordering(self, request):
+        # ChangeList сортирует выдачу get_search_results заново по get_ordering(): при поиске на PostgreSQL
+        # оставляем ранжирование search_products, клик по колонке по-прежнему его переопределяет
+        if request.GET.get(SEARCH_VAR, "").strip() and connection.vendor == "postgresql":
+            return ("-rank", "-pk")
+        return super().get_ordering(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_products(search_term, queryset), False
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ("id", "name")
+    list_display = ("id", "name", "products_count", "published_products_count")
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "recipient", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
@@ -0,0 +1,51 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+from django.views import View
+
+from catalog.models import Product, Category
+from catalog.services import (aget_products_page, aget_products_by_category, aget_generation, get_cache_timeout,
+                              get_product_permissions, CATEGORY_NAMESPACE)
+
+# Рендер шаблона синхронный (контекст-процессоры трогают request.user), поэтому уходит в поток
+arender = sync_to_async(render)
+
+
+class AsyncProductListView(View):
+    async def get(self, request):
+        products, next_cursor = await aget_products_page(request.GET.get('cursor'))
+        user = await request.auser()
+        permissions = await sync_to_async(get_product_permissions)(user)
+        context = {'object_list': products, 'product_list': products, 'next_cursor': next_cursor, **permissions}
+        return await arender(request, 'catalog/product_list.html', context)
+
+
+class AsyncProductDetailView(View):
+    async def get(self, request, pk):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        try:
+            product = await Product.objects.select_related('category').aget(pk=pk)
+        except Product.DoesNotExist:
+            raise Http404
+        updated_at = product.updated_at.timestamp() if product.updated_at else 0
+        context = {
+            'object': product,
+            'product': product,
+            'fragment_version': f"{updated_at}:{await aget_generation(CATEGORY_NAMESPACE)}",
+            'fragment_timeout': get_cache_timeout(),
+        }
+        return await arender(request, 'catalog/product_detail.html', context)
+
+
+class AsyncProductsByCategoryView(View):
+    async def get(self, request, category_id):
+        try:
+            category = await Category.objects.aget(pk=category_id)
+        except Category.DoesNotExist:
+            raise Http404
+        products = await aget_products_by_category(category_id)
+        return await arender(request, 'catalog/products_by_category.html',
+                             {'category': category, 'products': products})
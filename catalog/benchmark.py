@@ -0,0 +1,121 @@
+import statistics
+import time
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from blog.models import Post
+from catalog.models import Product, Category
+
+
+class CountingLocMemCache(LocMemCache):
+    """LocMemCache, который считает попадания и промахи для отчёта бенчмарка."""
+    hits = 0
+    misses = 0
+
+    def get(self, key, default=None, version=None):
+        sentinel = object()
+        value = super().get(key, sentinel, version)
+        if value is sentinel:
+            CountingLocMemCache.misses += 1
+            return default
+        CountingLocMemCache.hits += 1
+        return value
+
+    @classmethod
+    def reset_stats(cls):
+        cls.hits = cls.misses = 0
+
+
+def get_route_kwargs(namespace, pattern):
+    """Подставляет существующие pk в параметры маршрута."""
+    kwargs = {}
+    for name in pattern.pattern.converters:
+        if name == 'category_id':
+            kwargs[name] = Category.objects.values_list('pk', flat=True).first()
+        elif name == 'pk' and namespace == 'blog':
+            kwargs[name] = Post.objects.values_list('pk', flat=True).first()
+        elif name == 'pk':
+            kwargs[name] = Product.objects.values_list('pk', flat=True).first()
+    return kwargs
+
+
+def iter_routes(namespaces):
+    for namespace, module in namespaces:
+        seen = set()
+        for pattern in import_module(module).urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name and pattern.name not in seen:
+                seen.add(pattern.name)
+                yield namespace, pattern
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def consume(response):
+    """Дочитывает потоковый ответ: иначе в замер попадает только сборка ответа, а не выгрузка с её запросами."""
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+
+
+def measure_route(client, url, requests, warmup=2, login_user=None):
+    for _ in range(warmup):
+        if login_user:
+            client.force_login(login_user)
+        consume(client.get(url))
+
+    timings = []
+    queries = []
+    statuses = set()
+    CountingLocMemCache.reset_stats()
+    total_start = time.perf_counter()
+    for _ in range(requests):
+        if login_user:
+            client.force_login(login_user)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url)
+            consume(response)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    total = time.perf_counter() - total_start
+    lookups = CountingLocMemCache.hits + CountingLocMemCache.misses
+    return {
+        'url': url,
+        'status': sorted(statuses),
+        'requests': requests,
+        'req_per_s': round(requests / total, 1) if total else None,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': round(statistics.mean(queries), 2),
+        'cache_hit_ratio': round(CountingLocMemCache.hits / lookups, 3) if lookups else None,
+    }
+
+
+def run_routes(namespaces, requests=50, warmup=2):
+    user = get_user_model().objects.order_by('pk').first()
+    results = {}
+    for namespace, pattern in iter_routes(namespaces):
+        name = f'{namespace}:{pattern.name}'
+        try:
+            url = reverse(name, kwargs=get_route_kwargs(namespace, pattern))
+        except Exception as e:
+            results[name] = {'error': f'reverse failed: {e}'}
+            continue
+        for mode, login_user in (('anonymous', None), ('authenticated', user)):
+            try:
+                results[f'{name} [{mode}]'] = measure_route(Client(), url, requests, warmup, login_user)
+            except Exception as e:
+                results[f'{name} [{mode}]'] = {'url': url, 'error': repr(e)}
+    return results
@@ -0,0 +1,79 @@
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from catalog.models import Product
+
+# Поля, доступные партнёрам: имя в выгрузке -> поле values()
+EXPORT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'category_id': 'category_id',
+    'category': 'category__name',
+    'image': 'image',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+DEFAULT_EXPORT_FIELDS = ('id', 'name', 'description', 'price', 'category', 'image', 'updated_at')
+EXPORT_CHUNK_SIZE = 2000
+
+_encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: write() просто возвращает строку, чтобы её можно было отдать генератором."""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(fields, since=None):
+    """Опубликованные товары по одному словарю; в памяти только текущий чанк курсора."""
+    queryset = Product.objects.filter(is_published=True)
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    columns = [EXPORT_FIELDS[field] for field in fields]
+    for values in queryset.order_by('pk').values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = dict(zip(fields, values))
+        if row.get('image'):
+            row['image'] = f"{settings.MEDIA_URL}{row['image']}"
+        yield row
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield _encoder.encode(row) + '\n'
+
+
+def stream_json_array(rows):
+    yield '['
+    first = True
+    for row in rows:
+        yield ('' if first else ',\n') + _encoder.encode(row)
+        first = False
+    yield ']\n'
+
+
+def stream_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in fields])
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson', lambda rows, fields: stream_ndjson(rows)),
+    'json': ('application/json; charset=utf-8', 'json', lambda rows, fields: stream_json_array(rows)),
+    'csv': ('text/csv; charset=utf-8', 'csv', stream_csv),
+}
@@ -0,0 +1,99 @@
+import json
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import connections, transaction
+
+_decoder = json.JSONDecoder()
+
+
+def iter_fixture_objects(stream, chunk_size=64 * 1024):
+    """
+    Разбирает JSON-массив фикстуры (формат dumpdata/loaddata) по одному объекту,
+    держа в памяти только текущий кусок файла, а не весь документ.
+    """
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        if not eof and len(buffer) < chunk_size:
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+        buffer = buffer.lstrip()
+        if not started:
+            if not buffer:
+                if eof:
+                    return
+                continue
+            if buffer[0] != '[':
+                raise ValueError('Fixture must be a JSON array')
+            buffer = buffer[1:]
+            started = True
+            continue
+        buffer = buffer.lstrip(', \n\r\t')
+        if buffer.startswith(']'):
+            return
+        if not buffer:
+            if eof:
+                raise ValueError('Unexpected end of fixture')
+            continue
+        try:
+            obj, end = _decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Объект не поместился в буфер целиком — дочитываем
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield obj
+        buffer = buffer[end:]
+
+
+def _upsert_options(model):
+    update_fields = [field.name for field in model._meta.concrete_fields if field.serialize and not field.primary_key]
+    if not update_fields:
+        return {'ignore_conflicts': True}
+    return {'update_conflicts': True, 'unique_fields': [model._meta.pk.name], 'update_fields': update_fields}
+
+
+def import_objects(objects, batch_size=1000, using='default'):
+    """
+    Сохраняет объекты фикстуры через bulk_create пачками; каждая пачка — отдельная транзакция.
+    Как и loaddata, строки с уже существующим pk обновляются (upsert), поэтому повторный импорт
+    того же файла не падает на середине. Возвращает количество записанных строк.
+    """
+    total = 0
+    batch = []
+    batch_model = None
+    touched_models = set()
+
+    def flush():
+        nonlocal total
+        if batch:
+            with transaction.atomic(using=using):
+                batch_model.objects.using(using).bulk_create(batch, **_upsert_options(batch_model))
+            total += len(batch)
+            touched_models.add(batch_model)
+            batch.clear()
+
+    for raw in objects:
+        model = apps.get_model(raw['model'])
+        if model is not batch_model or len(batch) >= batch_size:
+            flush()
+            batch_model = model
+        for deserialized in Deserializer([raw], using=using):
+            batch.append(deserialized.object)
+    flush()
+
+    # Явные pk не двигают последовательности PostgreSQL
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), list(touched_models))
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    return total
@@ -2,7 +2,8 @@ from django import forms
 from .models import Product
 from django.core.exceptions import ValidationError
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from .models import CustomUser
+from users.models import User
+from .moderation import ForbiddenWordsMatcher
 
 FORBIDDEN_WORDS = [
     'казино',
@@ -16,6 +17,8 @@ FORBIDDEN_WORDS = [
     'радар',
 ]
 
+forbidden_words_matcher = ForbiddenWordsMatcher(FORBIDDEN_WORDS)
+
 
 class ProductForm(forms.ModelForm):
     class Meta:
@@ -30,16 +33,16 @@ class ProductForm(forms.ModelForm):
 
     def clean_name(self):
         name = self.cleaned_data.get('name', '')
-        for word in FORBIDDEN_WORDS:
-            if word.lower() in name.lower():
-                raise ValidationError(f'Название не должно содержать запрещённое слово: {word}')
+        found = forbidden_words_matcher.find_all(name)
+        if found:
+            raise ValidationError(f'Название не должно содержать запрещённые слова: {", ".join(found)}')
         return name
 
     def clean_description(self):
         description = self.cleaned_data.get('description', '')
-        for word in FORBIDDEN_WORDS:
-            if word.lower() in description.lower():
-                raise ValidationError(f'Описание не должно содержать запрещённое слово: {word}')
+        found = forbidden_words_matcher.find_all(description)
+        if found:
+            raise ValidationError(f'Описание не должно содержать запрещённые слова: {", ".join(found)}')
         return description
 
     def clean_price(self):
@@ -62,8 +65,8 @@ class RegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True)
 
     class Meta:
-        model = CustomUser
-        fields = ('email', 'username', 'password1', 'password2')
+        model = User
+        fields = ('email',)
 
 
 class LoginForm(AuthenticationForm):
@@ -72,5 +75,5 @@ class LoginForm(AuthenticationForm):
 
 class ProfileForm(forms.ModelForm):
     class Meta:
-        model = CustomUser
-        fields = ['avatar', 'phone_number', 'country']
+        model = User
+        fields = ['avatar', 'phone', 'country']
@@ -0,0 +1,101 @@
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+from PIL import Image, ImageOps
+
+# Ширина варианта в CSS-пикселях; для retina дополнительно генерируется x2
+VARIANT_SIZES = {
+    'avatar': 96,
+    'card': 400,
+    'detail': 900,
+}
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', 'image/webp'),
+    ('jpg', 'JPEG', 'image/jpeg'),
+)
+VARIANT_QUALITY = 80
+# Битый или отсутствующий оригинал запоминается ненадолго, чтобы не открывать его на каждом рендере карточки
+MISSING_VARIANTS_TIMEOUT = 60 * 10
+# Сколько живёт блокировка генерации, если рендер упал, не сняв её
+VARIANT_LOCK_TIMEOUT = 60
+
+
+def get_variant_name(name, width, extension):
+    base, _ = os.path.splitext(name)
+    return f"variants/{base}_{width}w.{extension}"
+
+
+def generate_variants(name, widths):
+    """Пересжимает оригинал во все нужные ширины и форматы; оригинал меньше ширины не растягивается."""
+    with default_storage.open(name) as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    for width in widths:
+        resized = original.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        for extension, pil_format, _ in VARIANT_FORMATS:
+            variant_name = get_variant_name(name, width, extension)
+            if default_storage.exists(variant_name):
+                continue
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, quality=VARIANT_QUALITY, optimize=True)
+            default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+
+
+def get_variant_urls(name, size):
+    """
+    URL-ы вариантов {(extension, width): url} или None, если оригинал не читается. Варианты создаются лениво
+    при первом обращении, результат (и неудача тоже) кэшируется, чтобы не ходить в хранилище на каждую карточку.
+    Генерирует один рендер (блокировка cache.add на изображение); параллельные первые рендеры горячей страницы
+    отдают оригинал, а не пересжимают его сами и не пишут дубли файлов с суффиксами.
+    """
+    width = VARIANT_SIZES[size]
+    widths = (width, width * 2)
+    cache_key = f"image_variants:{name}:{width}"
+    urls = cache.get(cache_key)
+    if urls is None:
+        lock_key = f"lock:{cache_key}"
+        if not cache.add(lock_key, 1, timeout=VARIANT_LOCK_TIMEOUT):
+            return None
+        try:
+            generate_variants(name, widths)
+        except (OSError, ValueError):
+            cache.set(cache_key, {}, timeout=MISSING_VARIANTS_TIMEOUT)
+            return None
+        else:
+            urls = {
+                (extension, w): default_storage.url(get_variant_name(name, w, extension))
+                for extension, _, _ in VARIANT_FORMATS
+                for w in widths
+            }
+            cache.set(cache_key, urls, timeout=None)
+        finally:
+            cache.delete(lock_key)
+    return urls or None
+
+
+def render_responsive_image(image, size='card', alt='', css_class=''):
+    """<picture> с WebP/JPEG srcset вместо оригинала полного размера."""
+    if not image:
+        return format_html('<img src="#" alt="{}" class="{}">', alt, css_class)
+    urls = get_variant_urls(image.name, size)
+    if urls is None:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="lazy">', image.url, alt, css_class)
+
+    width = VARIANT_SIZES[size]
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{} 1x, {} 2x">',
+        ((mime, urls[(extension, width)], urls[(extension, width * 2)])
+         for extension, _, mime in VARIANT_FORMATS if extension != 'jpg'),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{} 1x, {} 2x" alt="{}" class="{}" loading="lazy" decoding="async"></picture>',
+        sources, urls[('jpg', width)], urls[('jpg', width)], urls[('jpg', width * 2)], alt, css_class,
+    )
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.models import EmailOutbox
+
+
+def enqueue_email(subject, body, recipient, from_email=None):
+    """Единственное, что делает запрос: вставка строки. Отправкой занимается send_outbox."""
+    return EmailOutbox.objects.create(subject=subject, body=body, recipient=recipient, from_email=from_email)
+
+
+def get_backoff(attempts):
+    base = getattr(settings, 'EMAIL_OUTBOX_BACKOFF', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_MAX_BACKOFF', 60 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim_outbox_batch(batch_size=100):
+    """
+    Короткая транзакция: берёт готовые письма с SKIP LOCKED и переводит их в sending с арендой
+    до next_attempt_at. Письма, чья аренда истекла (воркер упал посреди пачки), снова попадают в выборку.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE', 5 * 60))
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING], next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status=EmailOutbox.STATUS_SENDING, next_attempt_at=now + lease)
+    return emails
+
+
+def send_outbox_batch(batch_size=100):
+    """
+    Отправляет пачку готовых писем через одно SMTP-соединение.
+    Письма забираются claim_outbox_batch, отправка идёт вне транзакции, и каждое письмо отмечается
+    отдельно: если воркер упадёт, уже отправленные останутся sent. Возвращает (sent, failed).
+    """
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent = failed = 0
+    emails = claim_outbox_batch(batch_size)
+    if not emails:
+        return sent, failed
+
+    connection = get_connection()
+    try:
+        # Явное open(): иначе send() каждого письма сам открывает и закрывает SMTP-сессию
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _record_failure(email, e, max_attempts)
+        return sent, len(emails)
+    try:
+        for email in emails:
+            message = EmailMessage(email.subject, email.body, email.from_email, [email.recipient],
+                                   connection=connection)
+            try:
+                message.send()
+            except Exception as e:
+                _record_failure(email, e, max_attempts)
+                failed += 1
+            else:
+                email.attempts += 1
+                email.status = EmailOutbox.STATUS_SENT
+                email.sent_at = timezone.now()
+                email.save(update_fields=['attempts', 'status', 'sent_at'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = EmailOutbox.STATUS_FAILED
+    else:
+        email.status = EmailOutbox.STATUS_PENDING
+        email.next_attempt_at = timezone.now() + get_backoff(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
@@ -0,0 +1,77 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, AsyncClient
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from catalog.benchmark import percentile
+from catalog.seeding import seed_dataset
+from catalog.models import Category
+
+
+class Command(BaseCommand):
+    help = ('Compare throughput of the sync (WSGI handler) and async (ASGI handler) catalog read views '
+            'at a given concurrency. Run with --settings=config.settings_bench. For a real deployment compare '
+            '"gunicorn config.wsgi" with "uvicorn config.asgi:application" using an external load generator.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed_dataset(products=options['products'], seed=options['seed'])
+            category_id = Category.objects.values_list('pk', flat=True).first()
+            pairs = (
+                ('product list', reverse('catalog:product_list'), reverse('catalog:product_list_async')),
+                ('products by category',
+                 reverse('catalog:products_by_category', args=[category_id]),
+                 reverse('catalog:products_by_category_async', args=[category_id])),
+            )
+            for title, sync_url, async_url in pairs:
+                self.report(f'{title} / WSGI', self.run_sync(sync_url, options['requests'], options['concurrency']))
+                self.report(f'{title} / ASGI', asyncio.run(
+                    self.run_async(async_url, options['requests'], options['concurrency'])))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run_sync(self, url, requests, concurrency):
+        def one(_):
+            start = time.perf_counter()
+            Client().get(url)
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(one, range(requests)))
+        return timings, time.perf_counter() - start
+
+    async def run_async(self, url, requests, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient()
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get(url)
+                return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(one() for _ in range(requests)))
+        return timings, time.perf_counter() - start
+
+    def report(self, title, result):
+        timings, total = result
+        self.stdout.write(
+            f'{title}: {len(timings) / total:.1f} req/s, p50 {statistics.median(timings):.2f} ms, '
+            f'p95 {percentile(timings, 95):.2f} ms, p99 {percentile(timings, 99):.2f} ms')
@@ -0,0 +1,43 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from catalog.forms import FORBIDDEN_WORDS
+from catalog.moderation import ForbiddenWordsMatcher
+
+
+def naive_find_all(words, text):
+    return [word for word in words if word.lower() in text.lower()]
+
+
+class Command(BaseCommand):
+    help = 'Compare the compiled forbidden-word matcher with the per-word loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=2000, help='Size of the synthetic word list')
+        parser.add_argument('--text-length', type=int, default=20000, help='Description length in characters')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        alphabet = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+        words = list(FORBIDDEN_WORDS)
+        while len(words) < options['words']:
+            words.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(5, 12))))
+        text = ' '.join(
+            ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 10)))
+            for _ in range(options['text_length'] // 7)
+        )[:options['text_length']]
+
+        matcher = ForbiddenWordsMatcher(words)
+        build = timeit.timeit(lambda: ForbiddenWordsMatcher(words), number=1)
+        naive = timeit.timeit(lambda: naive_find_all(words, text), number=options['repeat']) / options['repeat']
+        compiled = timeit.timeit(lambda: matcher.find_all(text), number=options['repeat']) / options['repeat']
+
+        self.stdout.write(f'words={len(words)} text={len(text)} chars')
+        self.stdout.write(f'matcher build: {build * 1000:.2f} ms (once)')
+        self.stdout.write(f'per-word loop: {naive * 1000:.2f} ms')
+        self.stdout.write(f'compiled:      {compiled * 1000:.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'speedup: x{naive / compiled:.1f}'))
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog.models import Post
+from catalog.models import Product, Category
+from catalog.seeding import seed_dataset
+from catalog.services import get_product_cards, seek_after
+
+
+class Command(BaseCommand):
+    help = ('Show query plans and latencies for the product/post list access paths. '
+            'Run once on "migrate catalog 0004 && migrate blog 0001" and once on the latest migrations '
+            'to compare plans before and after the indexes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=0,
+                            help='Insert N synthetic products and posts before measuring')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['rows']:
+            seed_dataset(products=options['rows'], posts=options['rows'], categories=20, seed=options['seed'])
+
+        category_id = Category.objects.values_list('pk', flat=True).first()
+        owner_product = Product.objects.exclude(owner=None).values('pk', 'owner_id').first()
+        queries = {
+            'product list, old ordering (description, name)':
+                Product.objects.order_by('description', 'name')[:12],
+            'product list, keyset ordering (created_at, id)':
+                Product.objects.order_by('-created_at', '-id')[:12],
+            'published products by category':
+                Product.objects.filter(is_published=True, category_id=category_id).order_by('-created_at')[:12],
+            'post list, old ordering (description, name)':
+                Post.objects.filter(was_publication=True).order_by('description', 'name')[:12],
+            'post list, new ordering (created_at, id)':
+                Post.objects.filter(was_publication=True).order_by('-created_at', '-id')[:12],
+        }
+        # Стоимость страницы по курсору не должна расти с глубиной: первая страница и курсор на 90% списка
+        products = get_product_cards()
+        posts = Post.objects.filter(was_publication=True)
+        for title, queryset in (('product list page', products), ('post list page', posts)):
+            queries[f'{title}, first (seek_after)'] = seek_after(queryset, None)[0][:13]
+            queries[f'{title}, deep cursor (seek_after)'] = seek_after(queryset, self.deep_position(queryset))[0][:13]
+        if owner_product:
+            queries['owner lookup (product_update/product_delete)'] = Product.objects.filter(
+                pk=owner_product['pk'], owner_id=owner_product['owner_id'])
+
+        analyze = {'analyze': True} if connection.vendor == 'postgresql' else {}
+        for title, queryset in queries.items():
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain(**analyze))
+            self.stdout.write(self.style.SUCCESS(
+                f'median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms\n'))
+
+    def deep_position(self, queryset):
+        dated = queryset.filter(created_at__isnull=False).order_by('-created_at', '-pk')
+        row = dated.values_list('created_at', 'pk')[dated.count() * 9 // 10:].first()
+        return tuple(row) if row else None
@@ -0,0 +1,79 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from catalog.benchmark import run_routes
+from catalog.seeding import seed_dataset
+
+NAMESPACES = (
+    ('catalog', 'catalog.urls'),
+    ('blog', 'blog.urls'),
+    ('users', 'users.urls'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database and drive every named route through the test client. '
+            'Run with --settings=config.settings_bench to use SQLite and locmem.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Previous JSON results to diff p50 and query counts against')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed_dataset(options['products'], options['posts'], options['categories'], options['users'],
+                         options['seed'])
+            routes = run_routes(NAMESPACES, options['requests'], options['warmup'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'commit': self.get_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': {key: options[key] for key in ('products', 'posts', 'categories', 'users', 'seed')},
+            'routes': routes,
+        }
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                previous = json.load(f)['routes']
+
+        for name, result in routes.items():
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f'{name}: {result["error"]}'))
+                continue
+            line = (f'{name}: {result["req_per_s"]} req/s, p50 {result["p50_ms"]} ms, p95 {result["p95_ms"]} ms, '
+                    f'p99 {result["p99_ms"]} ms, {result["queries"]} queries, cache hit {result["cache_hit_ratio"]}')
+            old = (previous or {}).get(name)
+            if old and 'p50_ms' in old:
+                line += f' | p50 {result["p50_ms"] - old["p50_ms"]:+.3f} ms, queries {result["queries"] - old["queries"]:+}'
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results saved to {options["output"]}'))
+
+    def get_commit(self):
+        try:
+            return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
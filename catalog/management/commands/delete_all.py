@@ -1,12 +1,18 @@
 from django.core.management.base import BaseCommand
-from catalog.models import Product, Category
+
+from catalog.seeding import purge_catalog
 
 
 class Command(BaseCommand):
-    help = 'Add test product'
+    help = 'Delete all products, posts and categories in chunks (or TRUNCATE) without loading rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--truncate', action='store_true', help='TRUNCATE the tables instead of chunked DELETE')
 
-    def handle(self, *args, **kwargs):
-        Product.objects.all().delete()
-        Category.objects.all().delete()
+    def handle(self, *args, **options):
+        purge_catalog(chunk_size=options['chunk_size'], truncate=options['truncate'], progress=self.progress)
+        self.stdout.write(self.style.SUCCESS('Catalog purged. Use seed_catalog to generate test data.'))
 
-        Product.objects.create(name="test", description="test", price="100", created_at="2024-12-04", updated_at="2024-12-04")
+    def progress(self, name, deleted, total):
+        self.stdout.write(f'{name}: {deleted} deleted')
@@ -0,0 +1,35 @@
+import time
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Stream catalog models to a fixture file (catalog.json format) without loading them into memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output file')
+        parser.add_argument('--models', nargs='+', default=['catalog.Category', 'catalog.Product'])
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--indent', type=int, default=4)
+
+    def handle(self, *args, **options):
+        counter = {'rows': 0}
+
+        def objects():
+            for label in options['models']:
+                queryset = apps.get_model(label)._default_manager.order_by('pk')
+                for obj in queryset.iterator(chunk_size=options['batch_size']):
+                    counter['rows'] += 1
+                    yield obj
+
+        start = time.perf_counter()
+        with open(options['path'], 'w', encoding='utf-8') as stream:
+            # JSON-сериализатор пишет в поток по одному объекту
+            serializers.serialize('json', objects(), stream=stream, indent=options['indent'],
+                                  ensure_ascii=False)
+        elapsed = time.perf_counter() - start
+        total = counter['rows']
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {total} objects in {elapsed:.2f} s ({total / elapsed if elapsed else 0:.0f} rows/s).'))
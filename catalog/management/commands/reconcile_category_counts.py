@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog.services import reconcile_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute Category.products_count and published_products_count from Product rows'
+
+    def handle(self, *args, **options):
+        updated = reconcile_category_counts()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {updated} categories.'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog.seeding import seed_dataset, purge_catalog
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, categories, products and posts with bulk_create (reproducible via --seed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--purge', action='store_true', help='Purge catalog data before seeding')
+        parser.add_argument('--truncate', action='store_true', help='Purge with TRUNCATE instead of chunked DELETE')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['purge'] or options['truncate']:
+            purge_catalog(chunk_size=options['batch_size'], truncate=options['truncate'])
+            self.stdout.write('Purged catalog data.')
+        seed_dataset(
+            products=options['products'],
+            posts=options['posts'],
+            categories=options['categories'],
+            users=options['users'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=self.progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - start:.1f} s.'))
+
+    def progress(self, name, done, total):
+        self.stdout.write(f'{name}: {done}/{total}')
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog.mail import send_outbox_batch
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Poll every N seconds (0 = drain the queue once and exit)')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_outbox_batch(batch_size=options['batch_size'])
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent}, failed {failed}.'))
+                continue
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,119 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Префикс файла -> нужна ли авторизация. Картинки товаров и постов (и их варианты) публичные,
+# аватары видят только вошедшие пользователи. Файлы вне этих префиксов не отдаются.
+MEDIA_ACCESS = {
+    'images/': False,
+    'post/': False,
+    'variants/': False,
+    'avatars/': True,
+}
+
+
+def media_access_allowed(request, name):
+    for prefix, login_required in MEDIA_ACCESS.items():
+        if name.startswith(prefix):
+            return not login_required or request.user.is_authenticated
+    return False
+
+
+def _offload(name, content_type):
+    """
+    Передаёт отдачу байтов фронтенду: nginx (X-Accel-Redirect) или apache/lighttpd (X-Sendfile).
+    Путь в заголовке percent-encoded: иначе Django кодирует не-ASCII имя по RFC 2047, и прокси файл не найдёт.
+    """
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'django')
+    if mode == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(name)}"
+        return response
+    if mode == 'sendfile':
+        # mod_xsendfile (XSendFileUnescape) и lighttpd раскодируют %XX обратно в путь
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = quote(os.path.join(str(settings.MEDIA_ROOT), name))
+        return response
+    return None
+
+
+def _file_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Отдача MEDIA с проверкой доступа. Если перед Django стоит прокси, байты отдаёт он
+    (Range и кэширование тоже на нём); иначе — FileResponse (sendfile через wsgi.file_wrapper)
+    с поддержкой Range, ETag и If-Modified-Since.
+    """
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep) or not os.path.isfile(full_path):
+        raise Http404
+    name = os.path.relpath(full_path, root).replace(os.sep, '/')
+    if not media_access_allowed(request, name):
+        raise Http404
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    offloaded = _offload(name, content_type)
+    if offloaded is not None:
+        return offloaded
+
+    stat = os.stat(full_path)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag or (
+            'HTTP_IF_NONE_MATCH' not in request.META
+            and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime)):
+        response = HttpResponseNotModified()
+    else:
+        response = _range_response(request, full_path, stat.st_size, etag, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=3600' if name.startswith('avatars/') else 'public, max-age=86400'
+    return response
+
+
+def _range_response(request, path, size, etag, content_type):
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', ''))
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if match is None or (if_range and if_range != etag):
+        # Полный файл: FileResponse отдаёт настоящий файл через wsgi.file_wrapper без копирования в Python
+        return FileResponse(open(path, 'rb'), content_type=content_type)
+
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = 0, size - 1
+    if start > end or start >= size:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    length = end - start + 1
+    response = StreamingHttpResponse(_file_range(path, start, length), status=206, content_type=content_type)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,400 @@
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.template.backends.django import Template
+from django.urls import Resolver404, resolve
+
+from blog.services import POST_LIST_NAMESPACE
+from catalog.services import aget_generation, get_generation, PRODUCT_LIST_NAMESPACE, PRODUCTS_BY_CATEGORY_NAMESPACE
+
+_current_timings = ContextVar('performance_timings', default=None)
+
+ROUTE_WINDOW = 1000
+CACHE_METHODS = ('get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many', 'incr', 'decr', 'touch',
+                 'has_key')
+# Асинхронные двойники (aget, aset, ...) вызываются из async-представлений
+CACHE_METHODS += tuple(f'a{name}' for name in CACHE_METHODS)
+
+
+class RequestTimings:
+    __slots__ = ('sql', 'queries', 'cache', 'cache_calls', 'template', 'active')
+
+    def __init__(self):
+        self.sql = self.cache = self.template = 0.0
+        self.queries = self.cache_calls = 0
+        self.active = set()
+
+
+def _timed(method, kind):
+    if iscoroutinefunction(method):
+        return _atimed(method, kind)
+
+    def wrapper(*args, **kwargs):
+        timings = _current_timings.get()
+        # Вложенные вызовы (get_many -> get) не считаются повторно
+        if timings is None or kind in timings.active:
+            return method(*args, **kwargs)
+        timings.active.add(kind)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.active.discard(kind)
+            _record(timings, kind, time.perf_counter() - start)
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def _atimed(method, kind):
+    async def wrapper(*args, **kwargs):
+        timings = _current_timings.get()
+        # Базовые aget/aset уходят в синхронные get/set через sync_to_async — их не считаем второй раз
+        if timings is None or kind in timings.active:
+            return await method(*args, **kwargs)
+        timings.active.add(kind)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            timings.active.discard(kind)
+            _record(timings, kind, time.perf_counter() - start)
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def _record(timings, kind, elapsed):
+    if kind == 'cache':
+        timings.cache += elapsed
+        timings.cache_calls += 1
+    else:
+        timings.template += elapsed
+
+
+def _install_hooks():
+    """Один раз оборачивает методы кэш-бэкендов и рендер шаблонов; вне запроса обёртка ничего не делает."""
+    if getattr(Template.render, '__wrapped__', None):
+        return
+    Template.render = _timed(Template.render, 'template')
+    # Импортируем классы всех настроенных бэкендов, чтобы обернуть и их методы
+    for alias in settings.CACHES:
+        caches[alias]
+    for cls in [BaseCache, *_all_subclasses(BaseCache)]:
+        for name in CACHE_METHODS:
+            if name in cls.__dict__:
+                setattr(cls, name, _timed(cls.__dict__[name], 'cache'))
+
+
+def _all_subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _all_subclasses(subclass)
+
+
+def _sql_timer(execute, sql, params, many, context):
+    timings = _current_timings.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings.sql += time.perf_counter() - start
+            timings.queries += 1
+
+
+class RouteStats:
+    """Скользящее окно последних запросов по каждому маршруту в памяти процесса."""
+
+    def __init__(self, window=ROUTE_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.count = defaultdict(int)
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def add(self, route, total, timings):
+        with self.lock:
+            self.count[route] += 1
+            self.samples[route].append((total, timings.sql, timings.queries, timings.cache, timings.template))
+
+    def snapshot(self):
+        with self.lock:
+            samples = {route: list(values) for route, values in self.samples.items()}
+            count = dict(self.count)
+        result = {}
+        for route, values in samples.items():
+            totals = sorted(value[0] * 1000 for value in values)
+            n = len(values)
+            result[route] = {
+                'count': count[route],
+                'window': n,
+                'p50_ms': round(totals[int(0.50 * (n - 1))], 3),
+                'p95_ms': round(totals[int(0.95 * (n - 1))], 3),
+                'p99_ms': round(totals[int(0.99 * (n - 1))], 3),
+                'avg_queries': round(sum(value[2] for value in values) / n, 2),
+                'avg_sql_ms': round(sum(value[1] for value in values) / n * 1000, 3),
+                'avg_cache_ms': round(sum(value[3] for value in values) / n * 1000, 3),
+                'avg_template_ms': round(sum(value[4] for value in values) / n * 1000, 3),
+            }
+        return result
+
+
+route_stats = RouteStats()
+
+
+class PerformanceMiddleware:
+    """
+    Меряет время SQL, кэша и шаблонов в запросе и копит агрегаты по маршрутам для catalog:performance_stats.
+    Заголовок Server-Timing получает только staff, либо все при SERVER_TIMING_PUBLIC = True.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _install_hooks()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with _ExecuteWrappers():
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        total = time.perf_counter() - start
+        public = getattr(settings, 'SERVER_TIMING_PUBLIC', False)
+        user = getattr(request, 'user', None)
+        return self.finish(request, response, timings, total, public or bool(user and user.is_staff))
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with _ExecuteWrappers():
+                response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        total = time.perf_counter() - start
+        public = getattr(settings, 'SERVER_TIMING_PUBLIC', False)
+        # request.user в async-режиме ленивый и синхронный, поэтому через auser(); его нет, если ответ
+        # отдан раньше AuthenticationMiddleware (статика, кэш анонимных страниц)
+        auser = getattr(request, 'auser', None)
+        user = await auser() if auser and not public else None
+        return self.finish(request, response, timings, total, public or bool(user and user.is_staff))
+
+    def finish(self, request, response, timings, total, show_timings):
+        if show_timings:
+            response['Server-Timing'] = ', '.join((
+                f'sql;dur={timings.sql * 1000:.2f};desc="{timings.queries} queries"',
+                f'cache;dur={timings.cache * 1000:.2f};desc="{timings.cache_calls} calls"',
+                f'template;dur={timings.template * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ))
+        match = getattr(request, 'resolver_match', None)
+        route_stats.add(match.view_name if match else 'unresolved', total, timings)
+        return response
+
+
+class _ExecuteWrappers:
+    def __enter__(self):
+        self.contexts = [connection.execute_wrapper(_sql_timer) for connection in connections.all()]
+        for context in self.contexts:
+            context.__enter__()
+
+    def __exit__(self, *exc_info):
+        for context in reversed(self.contexts):
+            context.__exit__(*exc_info)
+
+
+class StaticAssetsMiddleware:
+    """
+    Отдаёт файлы из STATIC_ROOT без прохода по остальному стеку: выбирает .br/.gz по Accept-Encoding,
+    для файлов с хэшем в имени ставит Cache-Control immutable на год. Ставится сразу после SecurityMiddleware.
+    """
+    hashed_max_age = 60 * 60 * 24 * 365
+    max_age = 60 * 60
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.static_url = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else f'/{settings.STATIC_URL}'
+        self.root = os.path.realpath(settings.STATIC_ROOT) if getattr(settings, 'STATIC_ROOT', None) else None
+        self.hashed_names = self.load_hashed_names()
+
+    def load_hashed_names(self):
+        if not self.root:
+            return set()
+        try:
+            with open(os.path.join(self.root, 'staticfiles.json'), encoding='utf-8') as f:
+                return set(json.load(f).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.serve_static(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        # stat и open файла дешевле, чем перевод всей цепочки middleware в поток
+        response = self.serve_static(request)
+        return response if response is not None else await self.get_response(request)
+
+    def serve_static(self, request):
+        if self.root and request.method in ('GET', 'HEAD') and request.path.startswith(self.static_url):
+            return self.serve(request, request.path[len(self.static_url):])
+        return None
+
+    def serve(self, request, name):
+        path = os.path.realpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if candidate in accept and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(path, 'rb'))
+            content_type, _ = mimetypes.guess_type(name)
+            response['Content-Type'] = content_type or 'application/octet-stream'
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Vary'] = 'Accept-Encoding'
+        if name in self.hashed_names:
+            response['Cache-Control'] = f'public, max-age={self.hashed_max_age}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={self.max_age}'
+        return response
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Полностраничный кэш для анонимных запросов (без cookie сессии), стоит до SessionMiddleware:
+    на попадании сессия, auth, CSRF и шаблоны не выполняются вовсе.
+    Ключ — путь, query и поколения данных страницы, поэтому запись товара или поста сразу делает
+    старые страницы недостижимыми. Ответы с Set-Cookie не кэшируются — в них есть что-то пользовательское.
+    """
+    # Меню каталога со счётчиками есть на всех страницах каталога, поэтому везде учитывается и его поколение
+    routes = {
+        'catalog:product_list': (PRODUCT_LIST_NAMESPACE, PRODUCTS_BY_CATEGORY_NAMESPACE),
+        'catalog:products_by_category': (PRODUCTS_BY_CATEGORY_NAMESPACE,),
+        'blog:posts_list': (POST_LIST_NAMESPACE,),
+    }
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        match = self.match(request)
+        if match is None:
+            return self.get_response(request)
+
+        generations = [get_generation(namespace) for namespace in self.routes[match.view_name]]
+        cache_key = self.get_cache_key(request, generations)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return self.build_response(request, match, cached)
+
+        response = self.get_response(request)
+        if self.is_cacheable(response):
+            cache.set(cache_key, self.freeze(response), timeout=self.get_timeout())
+        return response
+
+    async def __acall__(self, request):
+        match = self.match(request)
+        if match is None:
+            return await self.get_response(request)
+
+        generations = [await aget_generation(namespace) for namespace in self.routes[match.view_name]]
+        cache_key = self.get_cache_key(request, generations)
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return self.build_response(request, match, cached)
+
+        response = await self.get_response(request)
+        if self.is_cacheable(response):
+            await cache.aset(cache_key, self.freeze(response), timeout=self.get_timeout())
+        return response
+
+    def match(self, request):
+        """ResolverMatch кэшируемого маршрута или None, если запрос в кэш не идёт."""
+        if request.method not in ('GET', 'HEAD') or not getattr(settings, 'CACHE_ENABLED', False):
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES or 'messages' in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        return match if match.view_name in self.routes else None
+
+    def get_cache_key(self, request, generations):
+        query = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()
+        return f"anon_page:{request.path}:{query}:{':'.join(map(str, generations))}"
+
+    def get_timeout(self):
+        return getattr(settings, 'ANONYMOUS_PAGE_CACHE_TIMEOUT', 300)
+
+    def freeze(self, response):
+        return response.status_code, response.content, list(response.items())
+
+    def is_cacheable(self, response):
+        return (response.status_code == 200 and not response.streaming and not response.cookies
+                and 'private' not in response.get('Cache-Control', ''))
+
+    def build_response(self, request, match, cached):
+        # До URL-резолвера запрос не доходит; без resolver_match route_stats записал бы его в 'unresolved'
+        request.resolver_match = match
+        status, content, headers = cached
+        etag = dict(headers).get('ETag')
+        if etag and request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        response = HttpResponse(content, status=status)
+        for header, value in headers:
+            response[header] = value
+        return response
@@ -0,0 +1,34 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0004_emailoutbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="is_published",
+            field=models.BooleanField(
+                default=False, help_text="Is Published", verbose_name="Published"
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="owner",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Product Owner",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="products",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Owner",
+            ),
+        ),
+    ]
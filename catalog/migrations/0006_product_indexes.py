@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+# Порядок списка товаров (created_at DESC NULLS LAST, id DESC); NULLS LAST в индексе поддерживает только PostgreSQL
+CREATED_ID_INDEX = models.Index(
+    models.OrderBy(models.F("created_at"), descending=True, nulls_last=True),
+    models.OrderBy(models.F("id"), descending=True),
+    name="product_created_id_idx",
+)
+
+
+def create_created_id_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("catalog", "Product"), CREATED_ID_INDEX)
+
+
+def drop_created_id_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("catalog", "Product"), CREATED_ID_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0005_product_is_published_owner"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="product",
+            options={
+                "ordering": ["-created_at", "-id"],
+                "permissions": (("can_unpublish_product", "Can unpublish product"),),
+                "verbose_name": "Product",
+                "verbose_name_plural": "Products",
+            },
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="product", index=CREATED_ID_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_created_id_index, drop_created_id_index),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="product_cat_created_idx",
+            ),
+        ),
+    ]
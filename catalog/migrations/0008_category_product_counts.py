@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def reconcile_counts(apps, schema_editor):
+    Category = apps.get_model("catalog", "Category")
+    Product = apps.get_model("catalog", "Product")
+    products = Product.objects.filter(category=OuterRef("pk")).order_by().values("category")
+    Category.objects.update(
+        products_count=Coalesce(
+            Subquery(products.annotate(n=Count("pk")).values("n")), 0
+        ),
+        published_products_count=Coalesce(
+            Subquery(
+                products.filter(Q(is_published=True)).annotate(n=Count("pk")).values("n")
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0007_product_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="products_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Products"
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="published_products_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Published Products"
+            ),
+        ),
+        migrations.RunPython(reconcile_counts, migrations.RunPython.noop),
+    ]
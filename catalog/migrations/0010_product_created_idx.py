@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+# Индекс из миграции 0006 (NULLS LAST, только PostgreSQL) заменяется обычным: seek_after больше не сортирует
+# по NULLS LAST, а читает строки без created_at отдельным запросом
+CREATED_ID_INDEX = models.Index(
+    models.OrderBy(models.F("created_at"), descending=True, nulls_last=True),
+    models.OrderBy(models.F("id"), descending=True),
+    name="product_created_id_idx",
+)
+
+
+def drop_created_id_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("catalog", "Product"), CREATED_ID_INDEX)
+
+
+def create_created_id_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("catalog", "Product"), CREATED_ID_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0009_product_published_updated_idx"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(model_name="product", name="product_created_id_idx"),
+            ],
+            database_operations=[
+                migrations.RunPython(drop_created_id_index, create_created_id_index),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["-created_at", "-id"], name="product_created_idx"),
+        ),
+    ]
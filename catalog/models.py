@@ -1,11 +1,19 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, router, transaction
+from django.db.models import Q
 from django.conf import settings
+from django.utils import timezone
 
 
 class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name="Name", help_text="Category Name")
     description = models.TextField(verbose_name="Description", help_text="Description", blank=True, null=True)
+    # Денормализованные счётчики: поддерживаются сигналами Product и массовыми операциями,
+    # расхождения исправляет команда reconcile_category_counts
+    products_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Products")
+    published_products_count = models.PositiveIntegerField(default=0, editable=False,
+                                                           verbose_name="Published Products")
 
     class Meta:
         verbose_name = "Category"
@@ -19,7 +27,6 @@ class Product(models.Model):
     name = models.CharField(max_length=100, verbose_name="Name", help_text="Product Name")
     price = models.FloatField(verbose_name="Price", help_text="Price")
     description = models.TextField(verbose_name="Description", help_text="Description", null=True, blank=True)
-    owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, verbose_name="Category", help_text="Category", on_delete=models.CASCADE,
                                  null=True, blank=True)
     image = models.ImageField(upload_to='images/', verbose_name="Image", null=True, blank=True, help_text="Image")
@@ -30,24 +37,76 @@ class Product(models.Model):
                                       null=True)
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date Last Modified", help_text="Date Last Modified",
                                       null=True, blank=True)
+    # Заполняется триггером БД на PostgreSQL (см. миграцию 0007)
+    search_vector = SearchVectorField(null=True, editable=False, serialize=False)
 
     class Meta:
         verbose_name = "Product"
         verbose_name_plural = "Products"
-        ordering = ["description", "name"]
+        ordering = ["-created_at", "-id"]
         permissions = (
             ("can_unpublish_product", "Can unpublish product"),
         )
+        indexes = [
+            # Keyset-пагинация списка товаров: seek_after обходит строки без даты отдельным запросом,
+            # поэтому хватает обычного (created_at DESC, id DESC) на любой БД
+            models.Index(fields=["-created_at", "-id"], name="product_created_idx"),
+            # Товары категории: filter(category_id=...) в порядке списка
+            models.Index(fields=["category", "-created_at", "-id"], name="product_cat_created_idx"),
+            GinIndex(fields=["search_vector"], name="product_search_vector_idx"),
+            # Инкрементальная выгрузка партнёрам (?since=)
+            models.Index(fields=["updated_at"], condition=Q(is_published=True), name="product_published_updated_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Счётчики категорий сдвигаются на разницу с тем, что лежит в строке, а не в загруженном объекте:
+        # строка блокируется до конца транзакции, и параллельное сохранение или снятие с публикации
+        # не посчитает ту же дельту второй раз
+        using = kwargs.get("using") or router.db_for_write(Product, instance=self)
+        with transaction.atomic(using=using):
+            self._counters_before = self.lock_counters(using)
+            super().save(*args, **kwargs)
 
-class CustomUser(AbstractUser):
-    email = models.EmailField(unique=True)
-    avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
-    phone_number = models.CharField(max_length=20, null=True, blank=True)
-    country = models.CharField(max_length=50, null=True, blank=True)
+    def lock_counters(self, using):
+        """(category_id, is_published) из строки в БД под SELECT ... FOR UPDATE; None, если строки нет."""
+        if self.pk is None:
+            return None
+        return (Product.objects.using(using).select_for_update().filter(pk=self.pk)
+                .values_list("category_id", "is_published").first())
 
-    USERNAME_FIELD = 'email'
-    REQUIRED_FIELDS = ['username']
+
+class EmailOutbox(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255, verbose_name="Subject")
+    body = models.TextField(verbose_name="Body")
+    from_email = models.CharField(max_length=255, null=True, blank=True, verbose_name="From")
+    recipient = models.EmailField(verbose_name="Recipient")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Status")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Attempts")
+    last_error = models.TextField(blank=True, default='', verbose_name="Last Error")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Next Attempt")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date Added")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Date Sent")
+
+    class Meta:
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_status_next_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
@@ -0,0 +1,76 @@
+import re
+
+
+def _build_trie(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return trie
+
+
+def _trie_pattern(trie):
+    """
+    Собирает из префиксного дерева слов регулярное выражение:
+    ['крипта', 'криптовалюта'] -> 'крипт(?:а|овалюта)'.
+    Движок проверяет каждую позицию текста один раз по дереву, а не перебирает все слова подряд.
+    """
+    def build(node):
+        if list(node) == ['']:
+            return ''
+        alternatives = []
+        chars = []
+        optional = '' in node
+        for char, child in sorted(node.items(), reverse=True):
+            if char == '':
+                continue
+            tail = build(child)
+            if tail:
+                alternatives.append(re.escape(char) + tail)
+            else:
+                chars.append(re.escape(char))
+        if chars:
+            alternatives.append(chars[0] if len(chars) == 1 else f"[{''.join(chars)}]")
+        result = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        if optional:
+            result = f"(?:{result})?"
+        return result
+
+    return build(trie)
+
+
+class ForbiddenWordsMatcher:
+    """
+    Поиск всех запрещённых слов в тексте за один проход; шаблон компилируется один раз.
+    Регулярное выражение с опережающей проверкой находит каждую позицию, с которой начинается хотя бы одно
+    слово, в том числе внутри другого совпадения ('платно' в 'бесплатно'). С этой позиции обход дерева
+    собирает все слова, а не только самое длинное ('ab' и 'abc').
+    """
+
+    def __init__(self, words):
+        self.set_words(words)
+
+    def set_words(self, words):
+        self.words = sorted({word.lower() for word in words if word})
+        self._trie = _build_trie(self.words)
+        self._regex = re.compile(f"(?=(?:{_trie_pattern(self._trie)}))", re.IGNORECASE) if self.words else None
+
+    def find_all(self, text):
+        if not text or self._regex is None:
+            return []
+        found = {}
+        for match in self._regex.finditer(text):
+            for word in self._words_at(text, match.start()):
+                found.setdefault(word)
+        return list(found)
+
+    def _words_at(self, text, start):
+        node = self._trie
+        for end in range(start, len(text)):
+            node = node.get(text[end].lower())
+            if node is None:
+                return
+            if '' in node:
+                yield text[start:end + 1].lower()
@@ -0,0 +1,113 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from blog.models import Post, make_excerpt
+from blog.services import POST_LIST_NAMESPACE
+from catalog.models import Product, Category
+from catalog.services import (bump_generation, invalidate_product_caches, reconcile_category_counts,
+                              CATEGORY_NAMESPACE)
+
+WORDS = ['торт', 'мерч', 'плюшевый', 'набор', 'подарок', 'сувенир', 'комару', 'услуга', 'панчан', 'доставка',
+         'шоколадный', 'ручная', 'работа', 'редкий', 'коллекционный', 'новый', 'геншин', 'аккаунт', 'значок', 'кружка']
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+
+def seed_dataset(products=1000, posts=200, categories=10, users=20, seed=42, batch_size=5000, progress=None):
+    """
+    Синтетические пользователи, категории, товары и посты через bulk_create пачками.
+    Один и тот же seed даёт один и тот же набор; progress(model_name, done, total) вызывается после каждой пачки.
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    user_model = get_user_model()
+
+    # purge_catalog пользователей не трогает: при повторном посеве с тем же seed они уже есть и переиспользуются
+    for start, count in _batches(users, batch_size):
+        user_model.objects.bulk_create([
+            user_model(email=f'seed{seed}_{start + i}@example.com', password=password)
+            for i in range(count)
+        ], ignore_conflicts=True)
+        progress and progress('users', start + count, users)
+    owner_ids = list(user_model.objects.filter(email__startswith=f'seed{seed}_').values_list('pk', flat=True))
+
+    for start, count in _batches(categories, batch_size):
+        Category.objects.bulk_create([
+            Category(name=f'{rng.choice(WORDS).capitalize()} {start + i}',
+                     description=' '.join(rng.choices(WORDS, k=10)))
+            for i in range(count)
+        ])
+        progress and progress('categories', start + count, categories)
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+
+    for start, count in _batches(products, batch_size):
+        with transaction.atomic():
+            Product.objects.bulk_create([
+                Product(
+                    name=' '.join(rng.choices(WORDS, k=3)).capitalize(),
+                    description=' '.join(rng.choices(WORDS, k=rng.randint(10, 80))),
+                    price=round(rng.uniform(100, 10000), 2),
+                    category_id=rng.choice(category_ids) if category_ids else None,
+                    owner_id=rng.choice(owner_ids) if owner_ids else None,
+                    is_published=rng.random() < 0.8,
+                ) for _ in range(count)
+            ])
+        progress and progress('products', start + count, products)
+
+    for start, count in _batches(posts, batch_size):
+        with transaction.atomic():
+            descriptions = [' '.join(rng.choices(WORDS, k=rng.randint(50, 300))) for _ in range(count)]
+            Post.objects.bulk_create([
+                Post(
+                    name=' '.join(rng.choices(WORDS, k=4)).capitalize(),
+                    description=description,
+                    excerpt=make_excerpt(description),
+                    was_publication=rng.random() < 0.8,
+                    views_counter=rng.randint(0, 5000),
+                ) for description in descriptions
+            ])
+        progress and progress('posts', start + count, posts)
+
+    # bulk_create не шлёт сигналы, счётчики категорий считаем одним запросом в конце
+    reconcile_category_counts()
+    invalidate_product_caches()
+    bump_generation(CATEGORY_NAMESPACE)
+    bump_generation(POST_LIST_NAMESPACE)
+
+
+PURGE_MODELS = (Product, Post, Category)
+
+
+def purge_catalog(chunk_size=10000, truncate=False, progress=None):
+    """
+    Удаляет товары, посты и категории, не поднимая строки в Python.
+    truncate=True — TRUNCATE (на SQLite — DELETE) всех таблиц разом; иначе DELETE пачками по pk,
+    чтобы не держать долгую блокировку и не раздувать одну транзакцию.
+    Товары удаляются раньше категорий, поэтому каскады не нужны.
+    """
+    if truncate:
+        tables = [model._meta.db_table for model in PURGE_MODELS]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in connection.ops.sql_flush(no_style(), tables, reset_sequences=True):
+                cursor.execute(sql)
+    else:
+        for model in PURGE_MODELS:
+            deleted = 0
+            while True:
+                ids = list(model.objects.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    deleted += model.objects.filter(pk__in=ids)._raw_delete(connection.alias)
+                progress and progress(model._meta.model_name, deleted, None)
+
+    invalidate_product_caches()
+    bump_generation(CATEGORY_NAMESPACE)
+    bump_generation(POST_LIST_NAMESPACE)
@@ -1,15 +1,404 @@
+import asyncio
+import base64
+import math
+import random
+import time
+from datetime import datetime
+
 from django.core.cache import cache
 from django.conf import settings
-from .models import Product
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .local_cache import local_cache
+from .models import Product, Category
+
+
+_MISSING = object()
+
+PRODUCT_LIST_NAMESPACE = 'product_list'
+PRODUCTS_BY_CATEGORY_NAMESPACE = 'products_by_category'
+CATEGORY_NAMESPACE = 'category'
+
+
+# Поля, которые нужны карточке товара в списках; остальное (search_vector и т.п.) не грузим
+PRODUCT_CARD_FIELDS = ('id', 'name', 'description', 'image', 'price', 'is_published', 'created_at', 'owner_id',
+                       'category_id', 'category__id', 'category__name')
+
+
+def get_product_cards():
+    return Product.objects.select_related('category').only(*PRODUCT_CARD_FIELDS)
+
+
+def get_product_permissions(user):
+    """Права пользователя на товары, вычисленные один раз на запрос, а не в каждой карточке."""
+    if not user.is_authenticated:
+        return {'can_delete_products': False, 'can_unpublish_products': False}
+    return {
+        'can_delete_products': user.has_perm('catalog.delete_product'),
+        'can_unpublish_products': user.has_perm('catalog.can_unpublish_product'),
+    }
+
+
+def get_generation(namespace):
+    """
+    Текущее поколение пространства ключей; создаётся при первом обращении.
+    В L1 держится L1_GENERATION_TIMEOUT секунд — столько другие процессы могут не видеть чужую запись.
+    """
+    key = f"generation:{namespace}"
+    generation = local_cache.get(key)
+    if generation is not None:
+        return generation
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 1, timeout=None)
+        generation = cache.get(key, 1)
+    local_cache.set(key, generation, timeout=getattr(settings, 'L1_GENERATION_TIMEOUT', 1))
+    return generation
+
+
+def bump_generation(namespace):
+    """Делает все ключи пространства недостижимыми: старые значения просто истекут по TTL."""
+    key = f"generation:{namespace}"
+    local_cache.delete(key)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 2, timeout=None)
+        return cache.get(key, 2)
+
+
+async def aget_generation(namespace):
+    key = f"generation:{namespace}"
+    generation = local_cache.get(key)
+    if generation is not None:
+        return generation
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, 1, timeout=None)
+        generation = await cache.aget(key, 1)
+    local_cache.set(key, generation, timeout=getattr(settings, 'L1_GENERATION_TIMEOUT', 1))
+    return generation
+
+
+def make_cache_key(namespace, *parts):
+    suffix = ':'.join(str(part) for part in parts)
+    return f"{namespace}:g{get_generation(namespace)}:{suffix}"
+
+
+async def amake_cache_key(namespace, *parts):
+    suffix = ':'.join(str(part) for part in parts)
+    return f"{namespace}:g{await aget_generation(namespace)}:{suffix}"
+
+
+def get_cache_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def get_or_compute(cache_key, compute, timeout=None, lock_timeout=10, stale_timeout=60, beta=1.0):
+    """
+    Кэш с защитой от stampede.
+
+    - Значение хранится вместе со временем вычисления и логическим сроком; физический TTL больше
+      на stale_timeout, чтобы было что отдать, пока значение пересчитывается.
+    - Вероятностное раннее обновление (XFetch): чем ближе срок и дороже вычисление, тем раньше
+      один из запросов решит пересчитать значение заранее.
+    - Пересчитывает только тот, кто взял короткую блокировку cache.add(lock); остальные отдают
+      устаревшее значение, а если его нет — коротко ждут результат.
+    """
+    if not getattr(settings, 'CACHE_ENABLED', False):
+        return compute()
+
+    timeout = get_cache_timeout() if timeout is None else timeout
+    entry = cache.get(cache_key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+            return value
+
+    lock_key = f"lock:{cache_key}"
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            start = time.time()
+            value = compute()
+            delta = time.time() - start
+            cache.set(cache_key, (value, delta, time.time() + timeout), timeout=timeout + stale_timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        return entry[0]
+
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry[0]
+    return compute()
+
+
+async def aget_or_compute(cache_key, acompute, timeout=None, lock_timeout=10, stale_timeout=60, beta=1.0):
+    """Асинхронный вариант get_or_compute: тот же формат записи в кэше, acompute — корутинная функция."""
+    if not getattr(settings, 'CACHE_ENABLED', False):
+        return await acompute()
+
+    timeout = get_cache_timeout() if timeout is None else timeout
+    entry = await cache.aget(cache_key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+            return value
+
+    lock_key = f"lock:{cache_key}"
+    if await cache.aadd(lock_key, 1, timeout=lock_timeout):
+        try:
+            start = time.time()
+            value = await acompute()
+            delta = time.time() - start
+            await cache.aset(cache_key, (value, delta, time.time() + timeout), timeout=timeout + stale_timeout)
+            return value
+        finally:
+            await cache.adelete(lock_key)
+
+    if entry is not None:
+        return entry[0]
+
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        await asyncio.sleep(0.05)
+        entry = await cache.aget(cache_key)
+        if entry is not None:
+            return entry[0]
+    return await acompute()
+
+
+def get_two_tier(cache_key, compute, timeout=None, l1_timeout=None):
+    """Сначала L1 в памяти процесса, затем Redis через get_or_compute. Для маленьких горячих значений."""
+    if not getattr(settings, 'CACHE_ENABLED', False):
+        return compute()
+    value = local_cache.get(cache_key, _MISSING)
+    if value is _MISSING:
+        value = get_or_compute(cache_key, compute, timeout)
+        local_cache.set(cache_key, value, timeout=l1_timeout)
+    return value
+
+
+def get_categories():
+    # Список со счётчиками товаров, поэтому зависит от поколения товаров по категориям, а не только категорий
+    cache_key = make_cache_key(PRODUCTS_BY_CATEGORY_NAMESPACE, 'categories')
+    return get_two_tier(cache_key, lambda: list(Category.objects.order_by('name')))
 
 
 def get_products_by_category(category_id):
-    cache_key = f"products_by_category:{category_id}"
-    if getattr(settings, 'CACHE_ENABLED', False):
-        products = cache.get(cache_key)
-        if products is not None:
-            return products
-    products = Product.objects.filter(category_id=category_id)
-    if getattr(settings, 'CACHE_ENABLED', False):
-        cache.set(cache_key, list(products), timeout=300)
-    return products
+    cache_key = make_cache_key(PRODUCTS_BY_CATEGORY_NAMESPACE, category_id)
+    return get_or_compute(cache_key, lambda: list(get_product_cards().filter(category_id=category_id)))
+
+
+async def aget_products_by_category(category_id):
+    cache_key = await amake_cache_key(PRODUCTS_BY_CATEGORY_NAMESPACE, category_id)
+
+    async def fetch():
+        return [product async for product in get_product_cards().filter(category_id=category_id)]
+
+    return await aget_or_compute(cache_key, fetch)
+
+
+def encode_cursor(product):
+    """Токен следующей страницы: позиция последней строки (товара или поста) по (created_at, id)."""
+    return encode_position((product.created_at, product.pk))
+
+
+def encode_position(position):
+    created_at, pk = position
+    raw = f"{created_at.isoformat() if created_at else ''}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def page_cache_part(position):
+    """Часть ключа кэша страницы: токен пересобирается из разобранной позиции, мусор в ?cursor= даёт 'first'."""
+    return encode_position(position) if position is not None else 'first'
+
+
+def decode_cursor(token):
+    """Возвращает (created_at, id) или None, если токен пустой или битый."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def get_products_page(cursor=None, page_size=None):
+    """
+    Одна страница списка товаров по курсору (created_at DESC, id DESC).
+    Стоимость страницы не зависит от размера таблицы: seek по индексу вместо OFFSET.
+    Возвращает (products, next_cursor); next_cursor равен None на последней странице.
+    """
+    page_size = page_size or getattr(settings, 'PRODUCT_LIST_PAGE_SIZE', 12)
+    position = decode_cursor(cursor)
+    cache_key = make_cache_key(PRODUCT_LIST_NAMESPACE, page_cache_part(position), page_size)
+    return get_or_compute(cache_key, lambda: _fetch_products_page(position, page_size))
+
+
+async def aget_products_page(cursor=None, page_size=None):
+    page_size = page_size or getattr(settings, 'PRODUCT_LIST_PAGE_SIZE', 12)
+    position = decode_cursor(cursor)
+    cache_key = await amake_cache_key(PRODUCT_LIST_NAMESPACE, page_cache_part(position), page_size)
+
+    return await aget_or_compute(cache_key, lambda: afetch_page(get_product_cards(), position, page_size))
+
+
+def _fetch_products_page(position, page_size):
+    return fetch_page(get_product_cards(), position, page_size)
+
+
+def split_page(rows, page_size):
+    """Из page_size + 1 строк получает страницу и курсор следующей (None, если страница последняя)."""
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def seek_after(queryset, position):
+    """
+    Строки после позиции курсора в порядке (created_at DESC, id DESC); строки без created_at идут в конце.
+    Возвращает (dated, undated): undated — хвост без даты, которым добирается страница, когда строки с датой
+    кончились (None, если курсор уже в хвосте). Оба запроса — диапазон по индексу (created_at DESC, id DESC):
+    ведущее условие created_at <= X даёт границу скана, а не фильтр по строкам от самой новой.
+    """
+    dated = queryset.filter(created_at__isnull=False).order_by('-created_at', '-pk')
+    undated = queryset.filter(created_at__isnull=True).order_by('-pk')
+    if position is None:
+        return dated, undated
+    created_at, pk = position
+    if created_at is None:
+        return undated.filter(pk__lt=pk), None
+    return dated.filter(created_at__lte=created_at).exclude(created_at=created_at, pk__gte=pk), undated
+
+
+def fetch_page(queryset, position, page_size):
+    """Страница после позиции курсора: (rows, next_cursor). Хвост без даты запрашивается только на последней."""
+    dated, undated = seek_after(queryset, position)
+    rows = list(dated[:page_size + 1])
+    if undated is not None and len(rows) <= page_size:
+        rows += undated[:page_size + 1 - len(rows)]
+    return split_page(rows, page_size)
+
+
+async def afetch_page(queryset, position, page_size):
+    dated, undated = seek_after(queryset, position)
+    rows = [row async for row in dated[:page_size + 1]]
+    if undated is not None and len(rows) <= page_size:
+        rows += [row async for row in undated[:page_size + 1 - len(rows)]]
+    return split_page(rows, page_size)
+
+
+def invalidate_product_caches():
+    bump_generation(PRODUCT_LIST_NAMESPACE)
+    bump_generation(PRODUCTS_BY_CATEGORY_NAMESPACE)
+
+
+def apply_category_deltas(deltas):
+    """deltas: {category_id: (изменение total, изменение published)} — атомарные UPDATE ... SET x = x + n."""
+    for category_id, (total, published) in deltas.items():
+        if category_id is None or not (total or published):
+            continue
+        Category.objects.filter(pk=category_id).update(
+            products_count=F('products_count') + total,
+            published_products_count=F('published_products_count') + published,
+        )
+
+
+def reconcile_category_counts(category_ids=None):
+    """Пересчитывает счётчики одним UPDATE с подзапросами; возвращает число обновлённых категорий."""
+    products = Product.objects.filter(category=OuterRef('pk')).order_by().values('category')
+    queryset = Category.objects.all() if category_ids is None else Category.objects.filter(pk__in=category_ids)
+    transaction.on_commit(lambda: bump_generation(PRODUCTS_BY_CATEGORY_NAMESPACE))
+    return queryset.update(
+        products_count=Coalesce(Subquery(products.annotate(n=Count('pk')).values('n')), 0),
+        published_products_count=Coalesce(
+            Subquery(products.filter(is_published=True).annotate(n=Count('pk')).values('n')), 0),
+    )
+
+
+def _locked(queryset):
+    """
+    Та же выборка, но строки блокируются подзапросом SELECT ... FOR UPDATE до конца транзакции.
+    Параллельная правка тех же товаров ждёт, и дельты считаются по строкам, которые изменит этот запрос.
+    """
+    return Product.objects.filter(pk__in=queryset.order_by().select_for_update().values('pk'))
+
+
+def _count_by_category(queryset):
+    return {
+        row['category_id']: (row['total'], row['published'])
+        for row in queryset.order_by().values('category_id').annotate(
+            total=Count('pk'), published=Count('pk', filter=Q(is_published=True)))
+    }
+
+
+def unpublish_product(pk):
+    """
+    Снимает товар с публикации условным UPDATE ... WHERE is_published. Счётчик категории уменьшается,
+    только если строку изменил этот запрос, поэтому параллельные снятия не вычитают один товар дважды.
+    """
+    with transaction.atomic():
+        if not Product.objects.filter(pk=pk, is_published=True).update(is_published=False,
+                                                                       updated_at=timezone.now()):
+            return False
+        # Строка заблокирована нашим UPDATE до коммита, категорию никто не поменяет
+        category_id = Product.objects.filter(pk=pk).values_list('category_id', flat=True).get()
+        apply_category_deltas({category_id: (0, -1)})
+    transaction.on_commit(invalidate_product_caches)
+    return True
+
+
+def bulk_unpublish_products(queryset):
+    """Один UPDATE на всю выборку; update() не шлёт сигналы, поэтому кэши сбрасываются здесь один раз."""
+    with transaction.atomic():
+        queryset = _locked(queryset.filter(is_published=True))
+        counts = _count_by_category(queryset)
+        count = queryset.update(is_published=False, updated_at=timezone.now())
+        apply_category_deltas({category_id: (0, -published) for category_id, (_, published) in counts.items()})
+    if count:
+        transaction.on_commit(invalidate_product_caches)
+    return count
+
+
+def bulk_delete_products(queryset):
+    """
+    Один DELETE без загрузки строк в Python. На Product никто не ссылается внешним ключом,
+    поэтому каскады не нужны, а post_delete по каждой строке заменяет один сброс кэшей.
+    """
+    with transaction.atomic():
+        queryset = _locked(queryset)
+        counts = _count_by_category(queryset)
+        count = queryset.order_by()._raw_delete(queryset.db)
+        apply_category_deltas({category_id: (-total, -published)
+                               for category_id, (total, published) in counts.items()})
+    if count:
+        transaction.on_commit(invalidate_product_caches)
+    return count
+
+
+def search_products(query, queryset=None):
+    """
+    Полнотекстовый поиск по name/description.
+    На PostgreSQL использует поддерживаемый триггером search_vector и GIN-индекс с ранжированием,
+    на остальных БД (SQLite в тестах) — простой icontains; SQLite не учитывает регистр только у ASCII,
+    поэтому 'торт' там не найдёт 'Торт'.
+    """
+    queryset = Product.objects.all() if queryset is None else queryset
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config=getattr(settings, 'PRODUCT_SEARCH_CONFIG', 'russian'),
+                                   search_type='websearch')
+        return (queryset.filter(search_vector=search_query)
+                .annotate(rank=SearchRank(F('search_vector'), search_query))
+                .order_by('-rank', '-pk'))
+    return queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from catalog.models import Product, Category
+from catalog.services import (bump_generation, invalidate_product_caches, apply_category_deltas,
+                              PRODUCTS_BY_CATEGORY_NAMESPACE, CATEGORY_NAMESPACE)
+
+
+# Поколения сдвигаются после коммита: иначе параллельный читатель успеет положить в новый ключ
+# данные, которых транзакция ещё не записала, и они проживут весь CATALOG_CACHE_TIMEOUT
+@receiver([post_save, post_delete], sender=Product)
+def product_changed(sender, instance, using=None, **kwargs):
+    transaction.on_commit(invalidate_product_caches, using=using)
+
+
+@receiver(post_save, sender=Product)
+def update_category_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Исходные значения Product.save прочитал из заблокированной строки, поэтому дельта верна
+    # и для объекта с отложенными полями, и для устаревшего
+    old = (None, False) if created else instance._counters_before
+    new = (instance.category_id, instance.is_published)
+    deltas = defaultdict(lambda: (0, 0))
+    for (category_id, is_published), sign in ((old, -1), (new, 1)):
+        total, published = deltas[category_id]
+        deltas[category_id] = (total + sign, published + (sign if is_published else 0))
+    apply_category_deltas(deltas)
+
+
+@receiver(pre_delete, sender=Product)
+def lock_counters_on_delete(sender, instance, using=None, **kwargs):
+    # pre_delete приходит внутри транзакции удаления: строка заблокирована до её конца
+    instance._counters_before = instance.lock_counters(using)
+
+
+@receiver(post_delete, sender=Product)
+def update_category_counts_on_delete(sender, instance, **kwargs):
+    counters = getattr(instance, '_counters_before', None)
+    if counters is None:
+        # Строку уже удалил параллельный запрос, он же и поправил счётчики
+        return
+    category_id, is_published = counters
+    apply_category_deltas({category_id: (-1, -1 if is_published else 0)})
+
+
+def invalidate_category_caches():
+    bump_generation(PRODUCTS_BY_CATEGORY_NAMESPACE)
+    bump_generation(CATEGORY_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, using=None, **kwargs):
+    transaction.on_commit(invalidate_category_caches, using=using)
@@ -0,0 +1,47 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml', '.ico')
+MIN_COMPRESS_SIZE = 512
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest-хранилище с хэшем в имени файла, которое при collectstatic дополнительно
+    кладёт рядом .gz и .br (если установлен brotli). Отдаёт их StaticAssetsMiddleware.
+    """
+    # В шаблонах есть ссылки на отсутствующие иконки — не роняем рендер, а отдаём имя без хэша
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and isinstance(hashed_name, str) and not isinstance(processed, Exception):
+                self.compress(hashed_name)
+            yield name, hashed_name, processed
+        if not dry_run:
+            # Манифест и исходные (нехэшированные) копии тоже пригодятся в сжатом виде
+            for name in paths:
+                self.compress(name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        if not os.path.exists(path) or os.path.getsize(path) < MIN_COMPRESS_SIZE:
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
@@ -1,10 +1,16 @@
 from django import template
 
+from catalog.images import render_responsive_image
+from catalog.services import get_categories
+
 register = template.Library()
 
 
-@register.filter()
-def media_filter(path):
-    if path:
-        return f"/{path}"
-    return "#"
+@register.simple_tag()
+def responsive_image(image, size='card', alt='', css_class=''):
+    return render_responsive_image(image, size, alt, css_class)
+
+
+@register.inclusion_tag('catalog/includes/inc_category_menu.html')
+def category_menu():
+    return {'categories': get_categories()}
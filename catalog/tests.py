@@ -1,3 +1,756 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+from urllib.parse import quote
 
-# Create your tests here.
+import brotli
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from PIL import Image
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.benchmark import measure_route
+from catalog.fixtures import import_objects, iter_fixture_objects
+from catalog.forms import ProductForm
+from catalog.images import get_variant_urls
+from catalog.local_cache import local_cache
+from catalog.mail import claim_outbox_batch, enqueue_email, send_outbox_batch
+from catalog.middleware import (AnonymousPageCacheMiddleware, PerformanceMiddleware, StaticAssetsMiddleware,
+                                route_stats)
+from catalog.models import Product, Category, EmailOutbox
+from catalog.moderation import ForbiddenWordsMatcher
+from catalog.services import (get_products_page, get_products_by_category, get_generation, get_product_cards, seek_after,
+                              get_or_compute, aget_or_compute, unpublish_product, PRODUCT_LIST_NAMESPACE)
+from catalog.storage import CompressedManifestStaticFilesStorage
+from users.models import User
+
+
+@override_settings(CACHE_ENABLED=False)
+class ProductListQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(5)])
+        Product.objects.bulk_create([
+            Product(name=f'Product {i}', description='text', price=i, category=categories[i % 5])
+            for i in range(60)
+        ])
+
+    def render_cards(self, products):
+        return [(product.name, product.category.name, product.owner_id) for product in products]
+
+    def test_page_query_count_does_not_depend_on_page_size(self):
+        for page_size in (5, 50):
+            with self.assertNumQueries(1):
+                products, _ = get_products_page(page_size=page_size)
+                self.render_cards(products)
+
+    def test_products_by_category_single_query(self):
+        category = Category.objects.first()
+        with self.assertNumQueries(1):
+            self.render_cards(get_products_by_category(category.pk))
+
+
+def naive_find_all(words, text):
+    """Прежняя проверка ProductForm: по слову за проход."""
+    return [word.lower() for word in words if word.lower() in text.lower()]
+
+
+class ForbiddenWordsMatcherTest(SimpleTestCase):
+    def assertMatchesLoop(self, words, text):
+        found = ForbiddenWordsMatcher(words).find_all(text)
+        self.assertEqual(sorted(found), sorted(set(naive_find_all(words, text))))
+
+    def test_word_nested_in_another(self):
+        self.assertEqual(ForbiddenWordsMatcher(['платно', 'бесплатно']).find_all('бесплатно'),
+                         ['бесплатно', 'платно'])
+        self.assertMatchesLoop(['ab', 'abc', 'bc'], 'abc')
+
+    def test_case_insensitive_cyrillic(self):
+        self.assertEqual(ForbiddenWordsMatcher(['Крипта', 'казино']).find_all('КРИПТА и Казино, снова крипта'),
+                         ['крипта', 'казино'])
+
+    def test_prefixes_and_repeats(self):
+        self.assertMatchesLoop(['крипт', 'крипта', 'криптовалюта', 'валюта'], 'Криптовалюта, крипта')
+        self.assertMatchesLoop(['аа', 'ааа'], 'аааа')
+
+    def test_random_texts_match_the_per_word_loop(self):
+        rng = random.Random(4)
+        words = [''.join(rng.choices('абвАБ', k=rng.randint(1, 4))) for _ in range(30)]
+        for _ in range(200):
+            self.assertMatchesLoop(words, ''.join(rng.choices('абвгАБВ ', k=rng.randint(0, 30))))
+
+    def test_form_reports_every_word(self):
+        form = ProductForm(data={'name': 'Бесплатно', 'description': 'текст', 'price': 1})
+        self.assertFalse(form.is_valid())
+        self.assertIn('бесплатно', form.errors['name'][0])
+
+
+class CacheIsolationMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        local_cache.clear()
+
+
+@override_settings(PRODUCT_LIST_PAGE_SIZE=5)
+class ProductListViewTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create([Product(name=f'Product {i}', price=i, is_published=True) for i in range(12)])
+
+    def test_first_and_next_page(self):
+        response = self.client.get(reverse('catalog:product_list'))
+        self.assertEqual(response.status_code, 200)
+        first_page = [product.pk for product in response.context['object_list']]
+        self.assertEqual(len(first_page), 5)
+        self.assertTrue(response.context['next_cursor'])
+
+        response = self.client.get(reverse('catalog:product_list'), {'cursor': response.context['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+        second_page = [product.pk for product in response.context['object_list']]
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertEqual(first_page + second_page, sorted(first_page + second_page, reverse=True))
+
+    def test_invalid_cursor_shares_first_page_cache_entry(self):
+        get_products_page()
+        with self.assertNumQueries(0):
+            products, _ = get_products_page('not-a-cursor')
+        self.assertEqual(len(products), 5)
+
+
+@override_settings(CACHE_ENABLED=False)
+class SeekPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        products = Product.objects.bulk_create([Product(name=f'Product {i}', price=i) for i in range(9)])
+        for i, product in enumerate(products[3:7]):
+            Product.objects.filter(pk=product.pk).update(created_at=now - timedelta(days=i))
+        # Три товара с одной датой и два без даты: курсор должен различать их по id и дойти до хвоста без даты
+        Product.objects.filter(pk__in=[product.pk for product in products[:3]]).update(created_at=now)
+        Product.objects.filter(pk__in=[product.pk for product in products[7:]]).update(created_at=None)
+
+    def test_walk_covers_every_row_in_order(self):
+        rows = list(Product.objects.values_list('pk', 'created_at'))
+        expected = ([pk for pk, _ in sorted((row for row in rows if row[1]), reverse=True,
+                                            key=lambda row: (row[1], row[0]))]
+                    + sorted((pk for pk, created_at in rows if created_at is None), reverse=True))
+        walked, cursor = [], None
+        while True:
+            products, cursor = get_products_page(cursor, page_size=2)
+            walked += [product.pk for product in products]
+            if cursor is None:
+                break
+        self.assertEqual(walked, expected)
+
+    @skipUnless(connection.vendor == 'sqlite', 'query plan text is SQLite-specific')
+    def test_deep_cursor_is_an_index_range_scan(self):
+        last = Product.objects.filter(created_at__isnull=False).order_by('created_at', 'pk').first()
+        for queryset in seek_after(get_product_cards(), (last.created_at, last.pk)):
+            plan = queryset[:13].explain()
+            self.assertIn('USING INDEX product_created_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ProductSearchViewTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create(
+            [Product(name=f'Торт {i}', description='шоколадный', price=i, is_published=True) for i in range(14)]
+            + [Product(name='Торт черновик', price=1), Product(name='Кружка', price=1, is_published=True)]
+        )
+
+    def search(self, **params):
+        response = self.client.get(reverse('catalog:product_search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_only_published_matches(self):
+        response = self.search(q='Торт')
+        names = [product.name for product in response.context['products']]
+        self.assertEqual(len(names), 12)
+        self.assertTrue(all(name.startswith('Торт ') and name != 'Торт черновик' for name in names))
+        self.assertEqual(response.context['paginator'].count, 14)
+
+    def test_matches_description(self):
+        self.assertEqual(self.search(q='шоколадный').context['paginator'].count, 14)
+
+    def test_empty_query(self):
+        for query in ('', '   '):
+            response = self.search(q=query)
+            self.assertEqual(list(response.context['products']), [])
+            self.assertNotContains(response, 'Ничего не найдено')
+
+    def test_second_page(self):
+        first = self.search(q='Торт')
+        self.assertContains(first, '?q=%D0%A2%D0%BE%D1%80%D1%82&page=2')
+        second = self.search(q='Торт', page=2)
+        self.assertEqual(len(second.context['products']), 2)
+        self.assertFalse({product.pk for product in first.context['products']}
+                         & {product.pk for product in second.context['products']})
+
+    def test_admin_keeps_rank_ordering_on_postgresql(self):
+        superuser = User.objects.create(email='admin@example.com', is_staff=True, is_superuser=True)
+        self.client.force_login(superuser)
+        response = self.client.get(reverse('admin:catalog_product_changelist'), {'q': 'Торт'})
+        self.assertEqual(response.context['cl'].result_count, 15)
+        request = response.wsgi_request
+        model_admin = response.context['cl'].model_admin
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertEqual(model_admin.get_ordering(request), ('-rank', '-pk'))
+        self.assertEqual(model_admin.get_ordering(request), ())
+
+
+@override_settings(CACHE_ENABLED=True)
+class GetOrComputeTest(CacheIsolationMixin, SimpleTestCase):
+    key = 'stampede:test'
+
+    def put(self, value, expires_in):
+        cache.set(self.key, (value, 0, time.time() + expires_in), timeout=60)
+
+    def test_stale_value_while_another_caller_recomputes(self):
+        self.put('stale', -1)
+        cache.add(f'lock:{self.key}', 1)
+        compute = mock.Mock(return_value='fresh')
+        self.assertEqual(get_or_compute(self.key, compute), 'stale')
+        compute.assert_not_called()
+
+    def test_expired_value_is_recomputed_once(self):
+        self.put('stale', -1)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'fresh'
+
+        results = {}
+        worker = threading.Thread(target=lambda: results.update(first=get_or_compute(self.key, compute)))
+        worker.start()
+        started.wait(5)
+        results['second'] = get_or_compute(self.key, compute)
+        release.set()
+        worker.join(5)
+        self.assertEqual(results, {'first': 'fresh', 'second': 'stale'})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(get_or_compute(self.key, compute), 'fresh')
+        self.assertEqual(len(calls), 1)
+
+    def test_failing_compute_releases_lock(self):
+        with self.assertRaises(ZeroDivisionError):
+            get_or_compute(self.key, lambda: 1 / 0)
+        self.assertIsNone(cache.get(f'lock:{self.key}'))
+        self.assertEqual(get_or_compute(self.key, lambda: 'value'), 'value')
+
+    def test_waits_for_the_lock_holder(self):
+        cache.add(f'lock:{self.key}', 1)
+        compute = mock.Mock(return_value='own')
+        with mock.patch('catalog.services.time.sleep', side_effect=lambda _: self.put('computed', 60)):
+            self.assertEqual(get_or_compute(self.key, compute), 'computed')
+        compute.assert_not_called()
+
+    def test_falls_back_to_compute_after_lock_timeout(self):
+        cache.add(f'lock:{self.key}', 1)
+        self.assertEqual(get_or_compute(self.key, lambda: 'own', lock_timeout=0.1), 'own')
+
+    async def test_async_stale_value_and_fallback(self):
+        self.put('stale', -1)
+        cache.add(f'lock:{self.key}', 1)
+
+        async def compute():
+            return 'fresh'
+
+        self.assertEqual(await aget_or_compute(self.key, compute), 'stale')
+        cache.delete(self.key)
+        self.assertEqual(await aget_or_compute(self.key, compute, lock_timeout=0.1), 'fresh')
+
+    async def test_async_failing_compute_releases_lock(self):
+        async def compute():
+            raise ZeroDivisionError
+
+        with self.assertRaises(ZeroDivisionError):
+            await aget_or_compute(self.key, compute)
+        self.assertIsNone(cache.get(f'lock:{self.key}'))
+
+
+@override_settings(CACHE_ENABLED=True, PRODUCT_LIST_PAGE_SIZE=3)
+class AsyncCatalogViewsTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Category')
+        for i in range(4):
+            Product.objects.create(name=f'Product {i}', price=i, category=cls.category, is_published=True)
+        cls.user = User.objects.create(email='user@example.com')
+
+    async def test_list(self):
+        response = await self.async_client.get(reverse('catalog:product_list_async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['object_list']), 3)
+        self.assertTrue(response.context['next_cursor'])
+        self.assertFalse(response.context['can_delete_products'])
+
+        response = await self.async_client.get(reverse('catalog:product_list_async'),
+                                               {'cursor': response.context['next_cursor']})
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.assertIsNone(response.context['next_cursor'])
+
+    async def test_list_shares_cache_with_sync_service(self):
+        products, _ = await sync_to_async(get_products_page)()
+        # update() не шлёт сигналов и не сдвигает поколение: async-вьюха должна отдать записанное sync-сервисом
+        await Product.objects.aupdate(name='Renamed')
+        response = await self.async_client.get(reverse('catalog:product_list_async'))
+        self.assertEqual([product.name for product in response.context['object_list']],
+                         [product.name for product in products])
+
+    async def test_detail(self):
+        product = await Product.objects.afirst()
+        url = reverse('catalog:product_detail_async', args=[product.pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], f"{settings.LOGIN_URL}?next={quote(url)}")
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['product'].category.name, 'Category')
+        self.assertTrue(response.context['fragment_version'])
+
+        response = await self.async_client.get(reverse('catalog:product_detail_async', args=[product.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_category(self):
+        url = reverse('catalog:products_by_category_async', args=[self.category.pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['category'], self.category)
+        self.assertEqual(len(response.context['products']), 4)
+
+        response = await self.async_client.get(
+            reverse('catalog:products_by_category_async', args=[self.category.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_category_shares_cache_with_sync_service(self):
+        response = await self.async_client.get(reverse('catalog:products_by_category_async', args=[self.category.pk]))
+        await Product.objects.aupdate(name='Renamed')
+        products = await sync_to_async(get_products_by_category)(self.category.pk)
+        self.assertEqual([product.name for product in products],
+                         [product.name for product in response.context['products']])
+
+
+class InvalidationOnCommitTest(CacheIsolationMixin, TestCase):
+    def test_generation_moves_only_after_commit(self):
+        generation = get_generation(PRODUCT_LIST_NAMESPACE)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Product', price=1)
+            local_cache.clear()
+            self.assertEqual(get_generation(PRODUCT_LIST_NAMESPACE), generation)
+        local_cache.clear()
+        self.assertNotEqual(get_generation(PRODUCT_LIST_NAMESPACE), generation)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_USE_SSL=False,
+                   EMAIL_HOST_USER=None)
+class SendOutboxBatchTest(TestCase):
+    def test_batch_reuses_one_smtp_session(self):
+        for i in range(3):
+            enqueue_email('Subject', 'Body', f'user{i}@example.com', from_email='from@example.com')
+        with mock.patch('smtplib.SMTP') as smtp:
+            self.assertEqual(send_outbox_batch(), (3, 0))
+        self.assertEqual(smtp.call_count, 1)
+        self.assertEqual(smtp.return_value.sendmail.call_count, 3)
+        self.assertEqual(smtp.return_value.quit.call_count, 1)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT).count(), 3)
+
+    def test_sends_outside_the_claim_and_marks_each_email(self):
+        for i in range(2):
+            enqueue_email('Subject', 'Body', f'user{i}@example.com')
+        statuses = []
+
+        def sendmail(*args, **kwargs):
+            statuses.append(sorted(EmailOutbox.objects.values_list('status', flat=True)))
+            return {}
+
+        with mock.patch('smtplib.SMTP') as smtp:
+            smtp.return_value.sendmail.side_effect = sendmail
+            self.assertEqual(send_outbox_batch(), (2, 0))
+        self.assertEqual(statuses, [['sending', 'sending'], ['sending', 'sent']])
+
+    def test_expired_lease_is_claimed_again(self):
+        enqueue_email('Subject', 'Body', 'user@example.com')
+        self.assertEqual(len(claim_outbox_batch()), 1)
+        # Воркер упал после claim: до конца аренды письмо никто не берёт, потом его забирает другой
+        self.assertEqual(claim_outbox_batch(), [])
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('smtplib.SMTP'):
+            self.assertEqual(send_outbox_batch(), (1, 0))
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.STATUS_SENT)
+
+    def test_connection_failure_schedules_retry(self):
+        enqueue_email('Subject', 'Body', 'user@example.com')
+        with mock.patch('smtplib.SMTP', side_effect=OSError('refused')):
+            self.assertEqual(send_outbox_batch(), (0, 1))
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.status, email.attempts, email.last_error), (EmailOutbox.STATUS_PENDING, 1, 'refused'))
+
+
+class VariantUrlsTest(CacheIsolationMixin, TestCase):
+    def test_unreadable_original_is_not_reopened_on_every_render(self):
+        with mock.patch('catalog.images.default_storage.open', side_effect=OSError('missing')) as storage_open:
+            self.assertIsNone(get_variant_urls('images/missing.jpg', 'card'))
+            self.assertIsNone(get_variant_urls('images/missing.jpg', 'card'))
+        self.assertEqual(storage_open.call_count, 1)
+
+    def test_concurrent_render_does_not_generate(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with self.settings(MEDIA_ROOT=media_root):
+            name = default_storage.save('images/photo.jpg', ContentFile(self.make_jpeg()))
+            cache.add(f'lock:image_variants:{name}:400', 1)
+            with mock.patch('catalog.images.generate_variants') as generate:
+                self.assertIsNone(get_variant_urls(name, 'card'))
+            generate.assert_not_called()
+
+            cache.delete(f'lock:image_variants:{name}:400')
+            urls = get_variant_urls(name, 'card')
+            self.assertEqual(set(urls), {('webp', 400), ('webp', 800), ('jpg', 400), ('jpg', 800)})
+            self.assertEqual(sorted(os.listdir(os.path.join(media_root, 'variants', 'images'))),
+                             ['photo_400w.jpg', 'photo_400w.webp', 'photo_800w.jpg', 'photo_800w.webp'])
+            self.assertIsNone(cache.get(f'lock:image_variants:{name}:400'))
+
+    def make_jpeg(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500), 'red').save(buffer, 'JPEG')
+        return buffer.getvalue()
+
+
+class ImportFixtureTest(TestCase):
+    def import_fixture(self):
+        with open(settings.BASE_DIR / 'catalog.json', encoding='utf-8') as stream:
+            return import_objects(iter_fixture_objects(stream, chunk_size=256), batch_size=3)
+
+    def test_reimport_updates_existing_rows(self):
+        total = self.import_fixture()
+        product = Product.objects.order_by('pk').first()
+        name = product.name
+        Product.objects.filter(pk=product.pk).update(name='changed')
+
+        self.assertEqual(self.import_fixture(), total)
+        self.assertEqual(Product.objects.count() + Category.objects.count(), total)
+        product.refresh_from_db()
+        self.assertEqual(product.name, name)
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def test_server_timing_is_not_sent_to_anonymous_clients(self):
+        response = self.client.get(reverse('catalog:product_list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_server_timing_for_staff(self):
+        self.client.force_login(User.objects.create(email='staff@example.com', is_staff=True))
+        response = self.client.get(reverse('catalog:product_list'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+
+    @override_settings(SERVER_TIMING_PUBLIC=True)
+    def test_server_timing_public_setting(self):
+        response = self.client.get(reverse('catalog:product_list'))
+        self.assertIn('Server-Timing', response)
+
+    async def test_async_cache_calls_are_timed(self):
+        async def view(request):
+            await cache.aset('performance-test', 1)
+            await cache.aget('performance-test')
+            return HttpResponse()
+
+        async def staff():
+            return User(is_staff=True)
+
+        request = AsyncRequestFactory().get('/')
+        request.auser = staff
+        response = await PerformanceMiddleware(view)(request)
+        self.assertIn('desc="2 calls"', response['Server-Timing'])
+
+
+class ProductDetailConditionalGetTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(email='owner@example.com')
+        cls.other = User.objects.create(email='other@example.com')
+        cls.category = Category.objects.create(name='Category')
+        cls.product = Product.objects.create(name='Product', price=1, owner=cls.owner, category=cls.category)
+
+    def get_detail(self, **headers):
+        return self.client.get(reverse('catalog:product_detail', args=[self.product.pk]), headers=headers)
+
+    def test_if_modified_since_alone_does_not_revalidate(self):
+        self.client.force_login(self.owner)
+        response = self.get_detail()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+        self.client.force_login(self.other)
+        response = self.get_detail(if_modified_since='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_category_counts(self):
+        self.client.force_login(self.owner)
+        etag = self.get_detail()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Other', price=1, category=self.category)
+        local_cache.clear()
+        self.assertEqual(self.get_detail(if_none_match=etag).status_code, 200)
+
+
+class BulkModerationCountersTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moderator = User.objects.create(email='moderator@example.com', is_superuser=True)
+        cls.category = Category.objects.create(name='Category')
+        for i in range(4):
+            Product.objects.create(name=f'Product {i}', price=i, category=cls.category, is_published=True)
+
+    def moderate(self, **data):
+        self.client.force_login(self.moderator)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('catalog:product_bulk_moderation'), data)
+
+    def test_unpublish_updates_published_counter(self):
+        ids = Product.objects.order_by('pk').values_list('pk', flat=True)[:3]
+        response = self.moderate(action='unpublish', ids=','.join(map(str, ids)))
+        self.assertRedirects(response, reverse('catalog:product_list'))
+        self.category.refresh_from_db()
+        self.assertEqual((self.category.products_count, self.category.published_products_count), (4, 1))
+
+    def test_delete_by_category_updates_both_counters(self):
+        self.moderate(action='delete', category=self.category.pk)
+        self.category.refresh_from_db()
+        self.assertEqual((self.category.products_count, self.category.published_products_count), (0, 0))
+        self.assertFalse(Product.objects.exists())
+
+    def test_requires_permission(self):
+        self.client.force_login(User.objects.create(email='user@example.com'))
+        response = self.client.post(reverse('catalog:product_bulk_moderation'), {'action': 'delete', 'ids': '1'})
+        self.assertEqual(response.status_code, 403)
+
+
+class CategoryCountersTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moderator = User.objects.create(email='moderator@example.com', is_superuser=True)
+        cls.category, cls.other = Category.objects.bulk_create([Category(name='Category'), Category(name='Other')])
+        for i in range(4):
+            Product.objects.create(name=f'Product {i}', price=i, category=cls.category, is_published=True)
+        cls.product = Product.objects.order_by('pk').first()
+
+    def assertCounters(self, category, expected):
+        category.refresh_from_db()
+        self.assertEqual((category.products_count, category.published_products_count), expected)
+
+    def test_repeated_unpublish_counts_once(self):
+        self.client.force_login(self.moderator)
+        for _ in range(2):
+            self.client.post(reverse('catalog:product_unpublish', args=[self.product.pk]))
+        self.assertCounters(self.category, (4, 3))
+
+    def test_stale_instance_save_uses_stored_values(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        unpublish_product(self.product.pk)
+        # Полное сохранение устаревшего объекта снова публикует товар — счётчик должен это отразить
+        stale.save()
+        self.assertCounters(self.category, (4, 4))
+
+    def test_stale_instance_delete_uses_stored_values(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        unpublish_product(self.product.pk)
+        stale.delete()
+        self.assertCounters(self.category, (3, 3))
+
+    def test_category_change_with_deferred_fields(self):
+        product = Product.objects.only('name').get(pk=self.product.pk)
+        product.category = self.other
+        product.save()
+        self.assertCounters(self.category, (3, 3))
+        self.assertCounters(self.other, (1, 1))
+
+
+class StaticAssetsMiddlewareTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        with open(os.path.join(self.root, 'app.js'), 'w') as f:
+            f.write('console.log(1);')
+        with gzip.open(os.path.join(self.root, 'app.js.gz'), 'wt') as f:
+            f.write('console.log(1);')
+
+    async def test_async_chain_serves_precompressed_file(self):
+        async def view(request):
+            return HttpResponse('view')
+
+        with self.settings(STATIC_ROOT=self.root):
+            middleware = StaticAssetsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get('/static/app.js', headers={'accept_encoding': 'gzip'}))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response.close()
+        response = await middleware(AsyncRequestFactory().get('/catalog/'))
+        self.assertEqual(response.content, b'view')
+
+
+class CompressedStaticStorageTest(TestCase):
+    def test_writes_gzip_and_brotli_siblings(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with open(os.path.join(root, 'app.js'), 'w') as f:
+            f.write('console.log("static");\n' * 100)
+        CompressedManifestStaticFilesStorage(location=root).compress('app.js')
+        with gzip.open(os.path.join(root, 'app.js.gz'), 'rt') as f:
+            self.assertEqual(f.read(), 'console.log("static");\n' * 100)
+        with open(os.path.join(root, 'app.js.br'), 'rb') as f:
+            self.assertEqual(brotli.decompress(f.read()).decode(), 'console.log("static");\n' * 100)
+
+
+class ServeMediaTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'images'))
+        with open(os.path.join(self.root, 'images', 'тест.jpg'), 'wb') as f:
+            f.write(b'0123456789')
+        self.url = '/media/images/тест.jpg'
+
+    def test_range_request(self):
+        with self.settings(MEDIA_ROOT=self.root, MEDIA_SERVE_MODE='django'):
+            response = self.client.get(self.url, headers={'range': 'bytes=2-5'})
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+            self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+            response = self.client.get(self.url, headers={'range': 'bytes=20-'})
+            self.assertEqual(response.status_code, 416)
+
+    def test_offload_paths_are_percent_encoded(self):
+        with self.settings(MEDIA_ROOT=self.root, MEDIA_SERVE_MODE='nginx', MEDIA_ACCEL_REDIRECT_PREFIX='/protected/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/images/%D1%82%D0%B5%D1%81%D1%82.jpg')
+
+        with self.settings(MEDIA_ROOT=self.root, MEDIA_SERVE_MODE='sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], quote(os.path.join(self.root, 'images', 'тест.jpg')))
+        self.assertTrue(response['X-Sendfile'].isascii())
+
+
+class ProductExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Мерч')
+        Product.objects.create(name='Кружка', price=10, category=category, is_published=True)
+        Product.objects.create(name='Значок', price=5, category=category, is_published=True)
+        Product.objects.create(name='Черновик', price=1, category=category)
+
+    def export(self, **params):
+        response = self.client.get(reverse('catalog:product_export'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export(format='ndjson', fields='id,name,category').splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['Кружка', 'Значок'])
+        self.assertEqual(set(rows[0]), {'id', 'name', 'category'})
+
+    def test_json(self):
+        rows = json.loads(self.export(format='json'))
+        self.assertEqual(len(rows), 2)
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export(format='csv', fields='name,price'))))
+        self.assertEqual(rows, [['name', 'price'], ['Кружка', '10.0'], ['Значок', '5.0']])
+
+    def test_invalid_parameters(self):
+        for params in ({'format': 'xml'}, {'fields': 'name,password'}, {'since': 'yesterday'}):
+            self.assertEqual(self.client.get(reverse('catalog:product_export'), params).status_code, 400)
+
+    def test_benchmark_counts_streamed_queries(self):
+        # Без дочитывания потока выгрузка не выполнялась внутри замера и показывала 0 запросов
+        result = measure_route(Client(), reverse('catalog:product_export'), requests=1, warmup=0)
+        self.assertEqual(result['status'], [200])
+        self.assertGreaterEqual(result['queries'], 1)
+
+
+@override_settings(CACHE_ENABLED=True)
+class AnonymousPageCacheTest(CacheIsolationMixin, TestCase):
+    def test_cache_hits_are_recorded_under_their_route(self):
+        before = route_stats.snapshot().get('catalog:product_list', {}).get('count', 0)
+        unresolved = route_stats.snapshot().get('unresolved', {}).get('count', 0)
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('catalog:product_list')).status_code, 200)
+        self.assertEqual(route_stats.snapshot()['catalog:product_list']['count'], before + 2)
+        self.assertEqual(route_stats.snapshot().get('unresolved', {}).get('count', 0), unresolved)
+
+    async def test_async_chain(self):
+        calls = []
+
+        async def view(request):
+            calls.append(request)
+            return HttpResponse('page')
+
+        middleware = AnonymousPageCacheMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        for _ in range(2):
+            request = AsyncRequestFactory().get(reverse('catalog:product_list'))
+            response = await middleware(request)
+            self.assertEqual(response.content, b'page')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(request.resolver_match.view_name, 'catalog:product_list')
+
+
+class ProductListRenderQueryCountTest(CacheIsolationMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='user@example.com')
+        categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(3)])
+        Product.objects.bulk_create([
+            Product(name=f'Product {i}', price=i, category=categories[i % 3], owner=cls.user, is_published=True)
+            for i in range(30)
+        ])
+
+    def count_queries(self, page_size):
+        cache.clear()
+        local_cache.clear()
+        with self.settings(PRODUCT_LIST_PAGE_SIZE=page_size), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('catalog:product_list')).status_code, 200)
+        return len(queries)
+
+    def test_rendered_page_query_count_does_not_depend_on_page_size(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.count_queries(3), self.count_queries(25))
+
+
+class SeedCatalogTest(CacheIsolationMixin, TestCase):
+    def test_reseed_with_same_seed_after_purge(self):
+        options = {'products': 20, 'posts': 5, 'categories': 3, 'users': 4, 'seed': 7, 'stdout': io.StringIO()}
+        call_command('seed_catalog', **options)
+        call_command('seed_catalog', purge=True, **options)
+        self.assertEqual(User.objects.filter(email__startswith='seed7_').count(), 4)
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(sum(Category.objects.values_list('products_count', flat=True)), 20)
@@ -1,6 +1,7 @@
 from django.urls import path
 from catalog.apps import CatalogConfig
-from catalog.views import ProductListView, ProductDetailView, ProductCreateView, ProductUpdateView, ProductDeleteView, ProductUnpublishView, ProductsByCategoryView
+from catalog.views import ProductListView, ProductDetailView, ProductCreateView, ProductUpdateView, ProductDeleteView, ProductUnpublishView, ProductsByCategoryView, ProductSearchView, ProductBulkModerationView
+from catalog.async_views import AsyncProductListView, AsyncProductDetailView, AsyncProductsByCategoryView
 from . import views
 
 app_name = CatalogConfig.name
@@ -12,12 +13,13 @@ urlpatterns = [
     path('catalog/<int:pk>/update', ProductUpdateView.as_view(), name="products_update"),
     path('catalog/<int:pk>/delete', ProductDeleteView.as_view(), name="products_delete"),
     path('catalog/<int:pk>/unpublish', ProductUnpublishView.as_view(), name='product_unpublish'),
+    path('catalog/moderation/bulk', ProductBulkModerationView.as_view(), name='product_bulk_moderation'),
     path('catalog/category/<int:category_id>/', ProductsByCategoryView.as_view(), name='products_by_category'),
-    path('register/', views.register, name='register'),
-    path('login/', views.user_login, name='login'),
-    path('products/', product_list, name='product_list'),
-    path('products/create/', product_create, name='product_create'),
-    path('products/<int:pk>/edit/', product_update, name='product_edit'),
-    path('products/<int:pk>/delete/', product_delete, name='product_delete'),
-    path('profile/edit/', edit_profile, name='edit_profile'),
+    path('catalog/search/', ProductSearchView.as_view(), name='product_search'),
+    path('catalog/export/', views.product_export, name='product_export'),
+    path('stats/performance/', views.performance_stats, name='performance_stats'),
+    path('async/', AsyncProductListView.as_view(), name='product_list_async'),
+    path('async/catalog/<int:pk>/', AsyncProductDetailView.as_view(), name='product_detail_async'),
+    path('async/catalog/category/<int:category_id>/', AsyncProductsByCategoryView.as_view(),
+         name='products_by_category_async'),
 ]
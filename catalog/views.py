@@ -5,29 +5,40 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required, permission_required
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.core.cache import cache
-from django.conf import settings
+from django.views.decorators.http import condition, require_safe
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from catalog.models import Product, Category
 from django.contrib.auth import login, authenticate
-from django.core.mail import send_mail
 
 from catalog.models import Product, Category
 from catalog.forms import ProductForm, RegistrationForm, LoginForm
+from catalog.export import iter_export_rows, EXPORT_FIELDS, EXPORT_FORMATS, DEFAULT_EXPORT_FIELDS
+from catalog.mail import enqueue_email
+from catalog.local_cache import local_cache
+from catalog.middleware import route_stats
+from catalog.services import (get_products_by_category, get_products_page, search_products, get_generation,
+                              get_cache_timeout, get_product_cards, get_product_permissions, get_categories,
+                              unpublish_product, bulk_unpublish_products, bulk_delete_products, CATEGORY_NAMESPACE,
+                              PRODUCT_LIST_NAMESPACE, PRODUCTS_BY_CATEGORY_NAMESPACE)
 
 
 
 # Create your views here.
 
 def home(request):
-    products = Product.objects.all()
+    products = get_product_cards()
     context = {'products': products}
     return render(request, 'home.html', context)
 
 
 def contacts(request):
-    category = Category.objects.all()
+    category = get_categories()
     context = {'category': category}
     return render(request, 'contacts.html', context)
 
@@ -37,13 +48,12 @@ def register(request):
         form = RegistrationForm(request.POST)
         if form.is_valid():
             user = form.save()
-            # Отправка приветственного письма
-            send_mail(
+            # Приветственное письмо уходит через outbox (команда send_outbox)
+            enqueue_email(
                 'Добро пожаловать!',
                 'Спасибо за регистрацию на нашем сайте.',
-                'from@example.com',
-                [user.email],
-                fail_silently=False,
+                user.email,
+                from_email='from@example.com',
             )
             login(request, user)
             return redirect('home')
@@ -65,8 +75,8 @@ def user_login(request):
 
 
 def product_list(request):
-    products = Product.objects.all()
-    return render(request, 'product_list.html', {'products': products})
+    products = get_product_cards()
+    return render(request, 'product_list.html', {'products': products, **get_product_permissions(request.user)})
 
 
 @login_required
@@ -117,24 +127,64 @@ def edit_profile(request):
     return render(request, 'edit_profile.html', {'form': form})
 
 
+# Версии страниц для условных GET: ETag считается по поколениям кэша и updated_at, без рендера шаблона.
+# В ETag входит пользователь, потому что меню и кнопки у всех разные. Last-Modified не отдаётся:
+# он одинаков для всех, и клиент с одним If-Modified-Since получил бы 304 на чужую страницу.
+def _user_tag(request):
+    return request.user.pk or 'anon'
+
+
+def product_list_etag(request, *args, **kwargs):
+    cursor = request.GET.get('cursor', '')
+    generations = f"{get_generation(PRODUCT_LIST_NAMESPACE)}.{get_generation(PRODUCTS_BY_CATEGORY_NAMESPACE)}"
+    return f"list-{generations}-{cursor}-{_user_tag(request)}"
+
+
+def products_by_category_etag(request, category_id):
+    return f"category-{category_id}-{get_generation(PRODUCTS_BY_CATEGORY_NAMESPACE)}-{_user_tag(request)}"
+
+
+def product_detail_etag(request, pk):
+    updated_at = Product.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    # Меню категорий со счётчиками тоже часть страницы
+    generations = f"{get_generation(CATEGORY_NAMESPACE)}.{get_generation(PRODUCTS_BY_CATEGORY_NAMESPACE)}"
+    return f"product-{pk}-{updated_at.timestamp()}-{generations}-{_user_tag(request)}"
+
+
+@method_decorator(condition(etag_func=product_list_etag), name='get')
 class ProductListView(ListView):
     model = Product
+    # get_queryset отдаёт список страницы, а не QuerySet, поэтому имя шаблона задано явно
+    template_name = 'catalog/product_list.html'
 
     def get_queryset(self):
-        if getattr(settings, 'CACHE_ENABLED', False):
-            cache_key = 'product_list_queryset'
-            products = cache.get(cache_key)
-            if products is None:
-                products = list(super().get_queryset())
-                cache.set(cache_key, products, timeout=300)
-            return products
-        return super().get_queryset()
+        products, self.next_cursor = get_products_page(self.request.GET.get('cursor'))
+        return products
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        context.update(get_product_permissions(self.request.user))
+        return context
 
 
-@method_decorator(cache_page(60 * 5), name='dispatch')
+@method_decorator(condition(etag_func=product_detail_etag), name='get')
 class ProductDetailView(LoginRequiredMixin, DetailView):
     model = Product
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('category')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Общая часть страницы кэшируется по версии товара, кнопки владельца/модератора рендерятся на каждый запрос
+        updated_at = self.object.updated_at.timestamp() if self.object.updated_at else 0
+        context['fragment_version'] = f"{updated_at}:{get_generation(CATEGORY_NAMESPACE)}"
+        context['fragment_timeout'] = get_cache_timeout()
+        return context
+
 
 class ProductCreateView(LoginRequiredMixin, CreateView):
     model = Product
@@ -173,11 +223,48 @@ class ProductUnpublishView(LoginRequiredMixin, View):
     def post(self, request, pk):
         product = get_object_or_404(Product, pk=pk)
         if request.user.has_perm('catalog.can_unpublish_product'):
-            product.is_published = False
-            product.save(update_fields=['is_published'])
+            unpublish_product(product.pk)
         return redirect('catalog:product_detail', pk=product.pk)
 
 
+class ProductBulkModerationView(LoginRequiredMixin, View):
+    """
+    Массовая модерация: action=unpublish|delete по списку ids и/или фильтру (category, owner).
+    Право проверяется один раз на запрос, изменение — один UPDATE/DELETE.
+    """
+    actions = {
+        'unpublish': ('catalog.can_unpublish_product', bulk_unpublish_products, 'Снято с публикации'),
+        'delete': ('catalog.delete_product', bulk_delete_products, 'Удалено'),
+    }
+
+    def post(self, request):
+        action = self.actions.get(request.POST.get('action'))
+        if action is None:
+            return HttpResponseBadRequest('Unknown action')
+        permission, handler, message = action
+        if not request.user.has_perm(permission):
+            raise PermissionDenied
+
+        filters = {}
+        ids = [pk for value in request.POST.getlist('ids') for pk in value.split(',') if pk.strip()]
+        if ids:
+            filters['pk__in'] = ids
+        if request.POST.get('category'):
+            filters['category_id'] = request.POST['category']
+        if request.POST.get('owner'):
+            filters['owner_id'] = request.POST['owner']
+        if not filters:
+            return HttpResponseBadRequest('Specify ids or a filter')
+        try:
+            count = handler(Product.objects.filter(**filters))
+        except (ValueError, ValidationError):
+            return HttpResponseBadRequest('Invalid ids or filter')
+
+        messages.success(request, f'{message}: {count}')
+        return redirect('catalog:product_list')
+
+
+@method_decorator(condition(etag_func=products_by_category_etag), name='get')
 class ProductsByCategoryView(ListView):
     template_name = 'catalog/products_by_category.html'
     context_object_name = 'products'
@@ -190,3 +277,52 @@ class ProductsByCategoryView(ListView):
         context = super().get_context_data(**kwargs)
         context['category'] = get_object_or_404(Category, pk=self.kwargs['category_id'])
         return context
+
+
+class ProductSearchView(ListView):
+    template_name = 'catalog/product_search.html'
+    context_object_name = 'products'
+    paginate_by = 12
+
+    def get_queryset(self):
+        query = self.request.GET.get('q', '').strip()
+        if not query:
+            return Product.objects.none()
+        return search_products(query, get_product_cards().filter(is_published=True))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '').strip()
+        return context
+
+
+@require_safe
+def product_export(request):
+    """
+    Потоковая выгрузка опубликованных товаров: ?format=ndjson|csv|json&fields=id,name,...&since=<ISO datetime>.
+    Память не растёт с размером каталога: строки идут из курсора чанками прямо в ответ.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Unknown format')
+    fields = [field for field in request.GET.get('fields', '').split(',') if field] or list(DEFAULT_EXPORT_FIELDS)
+    unknown = set(fields) - set(EXPORT_FIELDS)
+    if unknown:
+        return HttpResponseBadRequest(f'Unknown fields: {", ".join(sorted(unknown))}')
+    since = None
+    if request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return HttpResponseBadRequest('Invalid since')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+    content_type, extension, render_rows = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(render_rows(iter_export_rows(fields, since), fields), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="products.{extension}"'
+    return response
+
+
+@staff_member_required
+def performance_stats(request):
+    return JsonResponse({'routes': route_stats.snapshot(), 'l1_cache': local_cache.stats()})
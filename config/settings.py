@@ -18,6 +18,29 @@ load_dotenv(override=True)
 # Cache flag
 CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'True') == 'True'
 
+# TTL for generation-keyed catalog caches; writes invalidate them immediately via signals
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', str(60 * 60 * 24)))
+
+# Text search configuration for the product search_vector trigger and queries
+PRODUCT_SEARCH_CONFIG = 'russian'
+
+# In-process L1 cache in front of Redis for small hot values (see catalog/local_cache.py)
+L1_CACHE_MAX_ENTRIES = int(os.getenv('L1_CACHE_MAX_ENTRIES', '1024'))
+L1_CACHE_TIMEOUT = int(os.getenv('L1_CACHE_TIMEOUT', '5'))
+L1_GENERATION_TIMEOUT = int(os.getenv('L1_GENERATION_TIMEOUT', '1'))
+
+# Server-Timing (SQL/cache/template durations) is sent to staff only unless this is enabled
+SERVER_TIMING_PUBLIC = os.getenv('SERVER_TIMING_PUBLIC', 'False') == 'True'
+
+# Full-page cache for anonymous (no session cookie) requests, see catalog.middleware
+ANONYMOUS_PAGE_CACHE_TIMEOUT = int(os.getenv('ANONYMOUS_PAGE_CACHE_TIMEOUT', '300'))
+
+# Products per page in the cursor-paginated catalog list
+PRODUCT_LIST_PAGE_SIZE = int(os.getenv('PRODUCT_LIST_PAGE_SIZE', '12'))
+
+# Posts per page in the cursor-paginated blog list
+POST_LIST_PAGE_SIZE = int(os.getenv('POST_LIST_PAGE_SIZE', '10'))
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,13 +65,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "catalog",
     "blog",
     "users",
 ]
 
 MIDDLEWARE = [
+    "catalog.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "catalog.middleware.StaticAssetsMiddleware",
+    "catalog.middleware.AnonymousPageCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -154,25 +181,48 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [BASE_DIR / 'static', ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic writes content-hashed files, the manifest and precompressed .gz/.br siblings
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "catalog.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Who streams media bytes after catalog.media.serve_media checks access:
+# 'django' - FileResponse with Range support, 'nginx' - X-Accel-Redirect to an internal location, 'sendfile' - X-Sendfile
+MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
 AUTH_USER_MODEL = 'users.User'
 
 LOGIN_URL = '/users/login/'
 LOGIN_REDIRECT_URL = '/'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Use django.core.mail.backends.console.EmailBackend / filebased.EmailBackend locally
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 EMAIL_HOST = 'smtp.yandex.ru'
 EMAIL_PORT = 465
 EMAIL_USE_SSL = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 
+# Outbox worker (manage.py send_outbox): retries with exponential backoff
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_BACKOFF = 30
+EMAIL_OUTBOX_MAX_BACKOFF = 60 * 60
+# Seconds a claimed batch stays with one worker; after that it is picked up again
+EMAIL_OUTBOX_LEASE = 5 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-AUTH_USER_MODEL = 'catalog.CustomUser'
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Settings for manage.py benchmark_routes: SQLite and locmem stand in for PostgreSQL and Redis.
+"""
+from config.settings import *  # noqa: F401,F403
+
+SECRET_KEY = SECRET_KEY or "benchmark"  # noqa: F405
+DEBUG = False
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "bench.sqlite3",  # noqa: F405
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "catalog.benchmark.CountingLocMemCache",
+        "LOCATION": "benchmark",
+    }
+}
+SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+
+# The benchmark never runs collectstatic, so there is no manifest of hashed names
+STORAGES = {
+    **STORAGES,  # noqa: F405
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,30 @@
+"""
+Settings for manage.py test --settings=config.settings_test: in-memory SQLite and locmem instead of PostgreSQL and Redis.
+"""
+from config.settings import *  # noqa: F401,F403
+
+SECRET_KEY = SECRET_KEY or "test"  # noqa: F405
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "test",
+    }
+}
+SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+
+# Tests never run collectstatic, so there is no manifest of hashed names
+STORAGES = {
+    **STORAGES,  # noqa: F405
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -1,9 +1,10 @@
 from django.contrib.auth import login, logout
 from django.contrib.auth.views import LoginView
-from django.core.mail import send_mail
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 
+from catalog.mail import enqueue_email
+
 from .forms import UserRegistrationForm, EmailAuthenticationForm
 
 
@@ -13,16 +14,11 @@ def register(request):
         if form.is_valid():
             user = form.save()
             login(request, user)
-            try:
-                send_mail(
-                    subject='Добро пожаловать!',
-                    message='Спасибо за регистрацию на нашем сайте.',
-                    from_email=None,
-                    recipient_list=[user.email],
-                    fail_silently=True,
-                )
-            finally:
-                pass
+            enqueue_email(
+                subject='Добро пожаловать!',
+                body='Спасибо за регистрацию на нашем сайте.',
+                recipient=user.email,
+            )
             return redirect('catalog:product_list')
     else:
         form = UserRegistrationForm()